@@ -0,0 +1,125 @@
+"""
+Сравнение Whisper float32 и int8 (динамическое квантование) на CPU
+
+Запуск из корня репозитория:
+
+    python -m benchmarks.whisper_int8 --model tiny --runs 3
+
+По умолчанию используется образец benchmarks/data/sample.flac — 11.5 с
+английской речи, синтезированной espeak-ng, с эталонным текстом sample.txt.
+Свою запись можно передать через --clip и --reference.
+
+Выводит время распознавания и WER относительно эталонной расшифровки для
+каждого compute_type.
+"""
+import re
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+import torch
+import whisper
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.model_registry import ModelRegistry
+
+DATA_DIR = Path(__file__).resolve().parent / 'data'
+
+def normalize_words(text):
+    """Слова в нижнем регистре без знаков препинания"""
+    return re.findall(r"[\w']+", text.lower())
+
+def word_error_rate(reference, hypothesis):
+    """WER: расстояние Левенштейна по словам, деленное на длину эталона"""
+    ref = normalize_words(reference)
+    hyp = normalize_words(hypothesis)
+    if not ref:
+        return float(bool(hyp))
+
+    previous = list(range(len(ref) + 1))
+    for i, word in enumerate(hyp, start=1):
+        current = [i]
+        for j, ref_word in enumerate(ref, start=1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != word)
+            ))
+        previous = current
+    return previous[-1] / len(ref)
+
+def run(model_name, compute_type, audio, reference, runs, language):
+    """Замер одного варианта модели"""
+    ModelRegistry.clear()
+    started = time.perf_counter()
+    model = ModelRegistry.whisper(model_name, 'cpu', compute_type)
+    load_seconds = time.perf_counter() - started
+
+    # Прогрев: первый вызов включает инициализацию ядер
+    model.transcribe(audio[:whisper.audio.SAMPLE_RATE * 5], language=language, fp16=False)
+
+    timings = []
+    text = ''
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = model.transcribe(audio, language=language, fp16=False)
+        timings.append(time.perf_counter() - started)
+        text = result.get('text', '')
+
+    duration = len(audio) / whisper.audio.SAMPLE_RATE
+    best = min(timings)
+    return {
+        'compute_type': compute_type,
+        'load_seconds': round(load_seconds, 2),
+        'transcribe_seconds': round(best, 2),
+        'real_time_factor': round(best / duration, 3) if duration else None,
+        'model_mb': ModelRegistry.memory_report(),
+        'wer': round(word_error_rate(reference, text), 4) if reference else None,
+        'text': text.strip()
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clip', default=str(DATA_DIR / 'sample.flac'), help='Аудио или видео файл')
+    parser.add_argument('--reference', default=str(DATA_DIR / 'sample.txt'), help='Эталонная расшифровка')
+    parser.add_argument('--model', default='tiny', help='Модель Whisper')
+    parser.add_argument('--language', default=None, help='Язык записи (по умолчанию определяется)')
+    parser.add_argument('--runs', type=int, default=3, help='Количество замеров')
+    parser.add_argument('--threads', type=int, default=0, help='Потоки torch (0 — по умолчанию)')
+    args = parser.parse_args()
+
+    clip = Path(args.clip)
+    if not clip.exists():
+        parser.error(f"Clip not found: {clip}")
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    reference_path = Path(args.reference)
+    reference = reference_path.read_text(encoding='utf-8') if reference_path.exists() else ''
+    audio = whisper.load_audio(str(clip))
+
+    results = [
+        run(args.model, compute_type, audio, reference, args.runs, args.language)
+        for compute_type in ('float32', 'int8')
+    ]
+
+    baseline, quantized = results
+    summary = {
+        'clip': str(clip),
+        'model': args.model,
+        'duration_seconds': round(len(audio) / whisper.audio.SAMPLE_RATE, 2),
+        'threads': torch.get_num_threads(),
+        'results': results,
+        'speedup': round(baseline['transcribe_seconds'] / max(quantized['transcribe_seconds'], 1e-6), 2)
+    }
+    if reference:
+        summary['wer_delta'] = round(quantized['wer'] - baseline['wer'], 4)
+
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+
+if __name__ == '__main__':
+    main()
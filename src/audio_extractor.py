@@ -1,11 +1,47 @@
 import os
 import logging
 import subprocess
+import tempfile
 from pathlib import Path
 from shutil import disk_usage
 
+import numpy as np
+
+from .ffmpeg_decoder import probe_streams
+
 logger = logging.getLogger(__name__)
 
+# Формат аудио, который ожидает Whisper
+SAMPLE_RATE = 16000
+# Размер блока чтения PCM из stdout ffmpeg (~2 секунды)
+PCM_CHUNK_SAMPLES = SAMPLE_RATE * 2
+
+def read_pcm(stream, expected_samples=0):
+    """Чтение s16le из потока в буфер с удвоением емкости"""
+    # Емкость по длительности из ffprobe, чтобы обычно обойтись без копий
+    buffer = np.empty(max(expected_samples, PCM_CHUNK_SAMPLES * 15) + PCM_CHUNK_SAMPLES, dtype=np.int16)
+    filled = 0
+    while True:
+        if len(buffer) - filled < PCM_CHUNK_SAMPLES:
+            grown = np.empty(len(buffer) * 2, dtype=np.int16)
+            grown[:filled] = buffer[:filled]
+            buffer = grown
+
+        view = memoryview(buffer[filled:filled + PCM_CHUNK_SAMPLES]).cast('B')
+        read = stream.readinto(view)
+        if not read:
+            break
+        # Добираем байт, если чтение оборвалось на середине отсчета
+        if read % 2:
+            extra = stream.read(1)
+            if extra:
+                view[read:read + 1] = extra
+                read += 1
+        filled += read // 2
+
+    # Преобразование в float32 без промежуточной копии int16
+    return np.multiply(buffer[:filled], 1.0 / 32768.0, dtype=np.float32)
+
 class AudioExtractor:
     def __init__(self, temp_dir):
         """
@@ -16,6 +52,7 @@ class AudioExtractor:
         """
         self.temp_dir = Path(temp_dir)
         self.temp_dir.mkdir(exist_ok=True)
+        self.last_plan = None
         self._check_ffmpeg()
         
     def _check_ffmpeg(self):
@@ -36,53 +73,123 @@ class AudioExtractor:
             logger.error(f"Error checking FFmpeg: {e}")
             raise
         
+    def plan(self, video_path, info=None):
+        """
+        Один вызов ffprobe и план извлечения аудио
+        
+        По потокам контейнера определяется, есть ли звук, его кодек, частота
+        и число каналов, а также признаки повреждения файла. По плану строится
+        ровно одна команда ffmpeg вместо цепочки повторных попыток.
+        
+        Args:
+            video_path (str): Путь к видео файлу
+            info (dict, optional): Готовый ответ probe_streams()
+            
+        Returns:
+            dict: План с ключами has_audio, stream, codec, sample_rate,
+                channels, duration, corrupt
+        """
+        plan = {
+            'has_audio': False,
+            'stream': None,
+            'codec': None,
+            'sample_rate': None,
+            'channels': None,
+            'duration': 0.0,
+            'corrupt': False
+        }
+        
+        try:
+            info = info or probe_streams(video_path)
+        except Exception as e:
+            # ffprobe не разобрал контейнер: пробуем ffmpeg с отбросом битых данных
+            logger.warning(f"ffprobe failed for {video_path}, treating file as corrupt: {e}")
+            plan['has_audio'] = True
+            plan['corrupt'] = True
+            self.last_plan = plan
+            return plan
+            
+        audio_streams = [s for s in info.get('streams', []) if s.get('codec_type') == 'audio']
+        if audio_streams:
+            stream = audio_streams[0]
+            plan['has_audio'] = True
+            # Номер среди аудио потоков для -map 0:a:N
+            plan['stream'] = 0
+            plan['codec'] = stream.get('codec_name')
+            plan['sample_rate'] = int(stream.get('sample_rate') or 0) or None
+            plan['channels'] = int(stream.get('channels') or 0) or None
+            plan['duration'] = float(
+                stream.get('duration') or info.get('format', {}).get('duration') or 0
+            )
+            # Без кодека, частоты или длительности поток, скорее всего, поврежден
+            plan['corrupt'] = not (plan['codec'] and plan['sample_rate'] and plan['duration'])
+            
+        logger.info(
+            f"Audio plan for {video_path}: has_audio={plan['has_audio']}, "
+            f"codec={plan['codec']}, sample_rate={plan['sample_rate']}, "
+            f"channels={plan['channels']}, corrupt={plan['corrupt']}"
+        )
+        self.last_plan = plan
+        return plan
+        
+    def _build_command(self, video_path, plan, output_args):
+        """Единственная команда ffmpeg для извлечения аудио по плану"""
+        command = ['ffmpeg', '-y', '-v', 'error', '-nostdin']
+        if plan['corrupt']:
+            # Игнорировать поврежденные данные вместо отдельной повторной попытки
+            command += ['-err_detect', 'ignore_err', '-fflags', '+genpts+igndts+discardcorrupt']
+        command += ['-i', str(video_path)]
+        
+        if plan['stream'] is not None:
+            command += ['-map', f"0:a:{plan['stream']}"]
+        command += ['-vn', '-sn', '-dn']
+        
+        # Ресемплинг и сведение в моно только если они нужны
+        if plan['channels'] != 1:
+            command += ['-ac', '1']
+        if plan['sample_rate'] != SAMPLE_RATE:
+            command += ['-ar', str(SAMPLE_RATE)]
+        return command + list(output_args)
+        
+    def pcm_command(self, video_path, plan):
+        """Команда ffmpeg, отдающая моно 16kHz s16le в stdout"""
+        return self._build_command(video_path, plan, ['-f', 's16le', 'pipe:1'])
+        
     def extract(self, video_path):
         """
-        Извлекает аудио из видео используя ffmpeg
+        Извлекает аудио из видео в WAV используя ffmpeg
         
         Args:
             video_path (str): Путь к видео файлу
             
         Returns:
-            str: Путь к извлеченному аудио файлу
+            str: Путь к извлеченному аудио файлу или None, если звука в видео нет
         """
         try:
             video_path = Path(video_path)
             if not video_path.exists():
                 raise FileNotFoundError(f"Video file not found: {video_path}")
                 
+            plan = self.plan(video_path)
+            if not plan['has_audio']:
+                logger.info(f"No audio stream in {video_path}, skipping extraction")
+                return None
+                
             # Проверка места на диске
             self._check_disk_space(video_path)
             
             # Путь к выходному файлу
             output_path = self.temp_dir / f"{Path(video_path).stem}.wav"
-            
-            # Добавляем параметры для обработки поврежденных файлов
-            command = [
-                'ffmpeg',
-                '-err_detect', 'ignore_err',  # Игнорировать ошибки
-                '-i', str(video_path),
-                '-vn',
-                '-ac', '1',  # моно
-                '-ar', '16000',  # частота дискретизации
-                '-b:a', '64k',  # низкий битрейт
-                '-f', 'wav',
-                str(output_path)
-            ]
-            
-            # Запускаем процесс
-            process = subprocess.Popen(
-                command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
+            command = self._build_command(
+                video_path, plan,
+                ['-acodec', 'pcm_s16le', '-f', 'wav', str(output_path)]
             )
             
-            stdout, stderr = process.communicate()
+            logger.info(f"Running command: {' '.join(command)}")
+            process = subprocess.run(command, capture_output=True, text=True)
             
             if process.returncode != 0:
-                logger.error(f"FFmpeg failed: {stderr.decode()}")
-                # Пробуем альтернативный метод
-                return self._extract_alternative(video_path)
+                raise RuntimeError(f"FFmpeg failed: {process.stderr.strip()}")
                 
             return str(output_path)
             
@@ -91,6 +198,48 @@ class AudioExtractor:
             self._cleanup_temp_files()
             raise
             
+    def extract_pcm(self, video_path):
+        """
+        Потоковое извлечение аудио в память без записи WAV файла
+
+        ffmpeg декодирует дорожку один раз и отдает моно 16kHz s16le в stdout,
+        отсчеты читаются прямо в растущий буфер NumPy.
+
+        Args:
+            video_path (str): Путь к видео файлу
+
+        Returns:
+            np.ndarray: Отсчеты float32 в диапазоне [-1, 1] с частотой 16kHz
+                или None, если звука в видео нет
+        """
+        video_path = Path(video_path)
+        if not video_path.exists():
+            raise FileNotFoundError(f"Video file not found: {video_path}")
+
+        plan = self.plan(video_path)
+        if not plan['has_audio']:
+            logger.info(f"No audio stream in {video_path}, skipping extraction")
+            return None
+
+        command = self.pcm_command(video_path, plan)
+        logger.info(f"Running command: {' '.join(command)}")
+
+        with tempfile.TemporaryFile() as stderr:
+            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=stderr)
+            try:
+                samples = read_pcm(process.stdout, int(plan['duration'] * SAMPLE_RATE))
+            finally:
+                process.stdout.close()
+                process.wait()
+
+            if process.returncode != 0:
+                stderr.seek(0)
+                error = stderr.read().decode(errors='replace').strip()
+                raise RuntimeError(f"FFmpeg audio stream failed: {error}")
+
+        logger.info(f"Extracted {len(samples) / SAMPLE_RATE:.1f}s of audio from {video_path}")
+        return samples
+
     def _check_disk_space(self, video_path):
         """Проверка свободного места на диске"""
         try:
@@ -122,118 +271,3 @@ class AudioExtractor:
                         logger.warning(f"Failed to remove temporary file {file_path}: {e}")
         except Exception as e:
             logger.error(f"Error cleaning temporary files: {e}")
-
-    def _extract_alternative(self, video_path):
-        """Альтернативный метод извлечения аудио с дополнительными параметрами"""
-        try:
-            logger.info("Trying alternative audio extraction method with more options")
-            output_path = self.temp_dir / f"{Path(video_path).stem}_alt.wav"
-            
-            # Используем более надежные параметры для проблемных файлов
-            command = [
-                'ffmpeg',
-                '-y',  # Перезаписывать выходной файл
-                '-v', 'error',  # Выводить только ошибки
-                '-err_detect', 'ignore_err',  # Игнорировать ошибки
-                '-fflags', '+genpts+igndts+discardcorrupt',  # Игнорировать поврежденные данные
-                '-i', str(video_path),
-                '-vn',  # Без видео
-                '-acodec', 'pcm_s16le',  # Кодек аудио
-                '-ar', '16000',  # Частота дискретизации
-                '-ac', '1',  # Моно
-                '-f', 'wav',  # Формат выходного файла
-                str(output_path)
-            ]
-            
-            logger.info(f"Running command: {' '.join(command)}")
-            process = subprocess.run(command, capture_output=True, text=True)
-            
-            if process.returncode != 0:
-                logger.error(f"Alternative extraction failed: {process.stderr}")
-                # Пробуем еще один метод с прямым извлечением аудио
-                return self._extract_direct(video_path)
-            
-            return str(output_path)
-        except Exception as e:
-            logger.error(f"Alternative extraction failed: {e}")
-            # Пробуем еще один метод
-            return self._extract_direct(video_path)
-        
-    def _extract_direct(self, video_path):
-        """Прямое извлечение аудио без перекодирования"""
-        try:
-            logger.info("Trying direct audio extraction without transcoding")
-            output_path = self.temp_dir / f"{Path(video_path).stem}_direct.wav"
-            
-            # Просто копируем аудио поток без перекодирования
-            command = [
-                'ffmpeg',
-                '-y',
-                '-v', 'error',
-                '-i', str(video_path),
-                '-vn',
-                '-acodec', 'copy',  # Копируем аудио без перекодирования
-                str(output_path.with_suffix('.aac'))  # Сохраняем в оригинальном формате
-            ]
-            
-            logger.info(f"Running command: {' '.join(command)}")
-            process = subprocess.run(command, capture_output=True, text=True)
-            
-            if process.returncode != 0:
-                logger.error(f"Direct extraction failed: {process.stderr}")
-                # Пробуем создать пустой аудиофайл для продолжения обработки
-                return self._create_empty_audio()
-            
-            # Теперь конвертируем в WAV
-            aac_path = output_path.with_suffix('.aac')
-            command = [
-                'ffmpeg',
-                '-y',
-                '-v', 'error',
-                '-i', str(aac_path),
-                '-acodec', 'pcm_s16le',
-                '-ar', '16000',
-                '-ac', '1',
-                str(output_path)
-            ]
-            
-            process = subprocess.run(command, capture_output=True, text=True)
-            
-            if process.returncode != 0:
-                logger.error(f"Conversion to WAV failed: {process.stderr}")
-                return self._create_empty_audio()
-            
-            return str(output_path)
-        except Exception as e:
-            logger.error(f"Direct extraction failed: {e}")
-            return self._create_empty_audio()
-        
-    def _create_empty_audio(self):
-        """Создание пустого аудиофайла для продолжения обработки"""
-        try:
-            logger.warning("Creating empty audio file as fallback")
-            output_path = self.temp_dir / "empty_audio.wav"
-            
-            # Создаем пустой аудиофайл длительностью 1 секунда
-            command = [
-                'ffmpeg',
-                '-y',
-                '-f', 'lavfi',
-                '-i', 'anullsrc=r=16000:cl=mono',
-                '-t', '1',
-                '-acodec', 'pcm_s16le',
-                '-ar', '16000',
-                '-ac', '1',
-                str(output_path)
-            ]
-            
-            process = subprocess.run(command, capture_output=True, text=True)
-            
-            if process.returncode != 0:
-                logger.error(f"Failed to create empty audio: {process.stderr}")
-                raise RuntimeError("Could not create empty audio file")
-            
-            return str(output_path)
-        except Exception as e:
-            logger.error(f"Failed to create empty audio: {e}")
-            raise
\ No newline at end of file
@@ -0,0 +1,412 @@
+import os
+import time
+import logging
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .audio_extractor import SAMPLE_RATE
+from .model_registry import ModelRegistry
+
+logger = logging.getLogger(__name__)
+
+# Длина кадра для поиска тихой точки разреза (30 мс)
+CUT_FRAME = SAMPLE_RATE * 30 // 1000
+
+# Модель Whisper процесса-исполнителя пула
+_worker_model = None
+
+def _init_worker(model_name, device, compute_type, threads):
+    """Загрузка одной модели Whisper на процесс пула"""
+    global _worker_model
+    import torch
+    torch.set_num_threads(threads)
+    _worker_model = ModelRegistry.whisper(model_name, device, compute_type)
+
+def _transcribe_shared(path, length, pieces, options):
+    """Транскрибация куска из общего memory-mapped PCM файла в процессе пула"""
+    samples = np.memmap(path, dtype=np.float32, mode='r', shape=(length,))
+    return _transcribe_pieces(_worker_model, samples, pieces, options)
+
+def _transcribe_pieces(model, samples, pieces, options):
+    """
+    Транскрибация куска, склеенного из участков записи
+
+    Returns:
+        dict: 'text' и 'segments' со временем исходной записи в секундах
+    """
+    audio = np.concatenate([np.asarray(samples[start:end]) for start, end in pieces])
+    result = model.transcribe(audio, **options)
+
+    # Отображение времени склеенного куска во время исходной записи
+    lengths = np.array([end - start for start, end in pieces], dtype=np.int64)
+    chunk_starts = np.concatenate([[0], np.cumsum(lengths)[:-1]]) / SAMPLE_RATE
+    source_starts = np.array([start for start, _ in pieces], dtype=np.int64) / SAMPLE_RATE
+
+    def to_source(t):
+        k = max(int(np.searchsorted(chunk_starts, t, side='right')) - 1, 0)
+        return float(source_starts[k] + t - chunk_starts[k])
+
+    segments = []
+    for segment in result.get('segments', []):
+        start = to_source(segment['start'])
+        # Конец относится к тому же участку, что и последний звук сегмента
+        end = max(to_source(max(segment['end'] - 1e-3, segment['start'])), start)
+        segments.append({'start': start, 'end': end, 'text': segment.get('text', '')})
+    return {'text': result.get('text', ''), 'segments': segments}
+
+class ChunkedTranscriber:
+    def __init__(self, model_name, device='cpu', compute_type='float32',
+                 chunk_duration=30, overlap=1.0, search_window=5.0,
+                 max_workers=1, temp_dir=None, options=None):
+        """
+        Параллельная транскрибация записи кусками по chunk_duration секунд
+
+        Куски режутся в самых тихих точках рядом с границей chunk_duration.
+        Каждый процесс пула держит свою модель Whisper и читает куски из
+        общего memory-mapped PCM файла, поэтому запись не копируется в
+        аргументы задач.
+
+        Args:
+            model_name (str): Модель Whisper
+            device (str): Устройство для модели
+            compute_type (str): 'float32' или 'int8' (квантованная модель на CPU)
+            chunk_duration (float): Максимальная длина куска в секундах
+            overlap (float): Перекрытие кусков при разрезе внутри речи
+            search_window (float): Окно поиска тихой точки перед границей
+            max_workers (int): Количество процессов; 1 — без пула
+            temp_dir (str, optional): Директория для общего PCM файла
+            options (dict, optional): Параметры model.transcribe
+        """
+        self.model_name = model_name
+        self.device = device
+        self.compute_type = compute_type
+        self.chunk_samples = int(chunk_duration * SAMPLE_RATE)
+        self.overlap_samples = int(overlap * SAMPLE_RATE)
+        self.search_samples = int(search_window * SAMPLE_RATE)
+        self.max_workers = max(1, int(max_workers))
+        self.temp_dir = temp_dir
+        self.options = dict(options or {})
+        self._pool = None
+        self.stats = {}
+
+    @classmethod
+    def from_config(cls, config, device='cpu', temp_dir=None):
+        """Создание из полной конфигурации (transcription и parallel_processing)"""
+        transcription = config.get('transcription', {})
+        whisper_config = config.get('whisper', {})
+        parallel = config.get('parallel_processing', {})
+        max_workers = parallel.get('max_workers', 1) if parallel.get('enabled', False) else 1
+        return cls(
+            transcription.get('model', 'small'),
+            device=device,
+            compute_type=whisper_config.get('compute_type', 'float32'),
+            chunk_duration=transcription.get('chunk_duration', 30),
+            overlap=transcription.get('chunk_overlap', 1.0),
+            search_window=transcription.get('chunk_search_window', 5.0),
+            max_workers=max_workers,
+            temp_dir=temp_dir,
+            options={'language': transcription['language']} if transcription.get('language') else None
+        )
+
+    def transcribe(self, samples, spans=None, language=None):
+        """
+        Транскрибация записи или ее участков
+
+        Args:
+            samples (np.ndarray): Отсчеты float32 16kHz
+            spans (list, optional): Участки (начало, конец) в отсчетах,
+                например участки речи. По умолчанию вся запись.
+            language (str, optional): Язык речи для этого вызова вместо options
+
+        Returns:
+            dict: 'text' и 'segments' по порядку с временем исходной записи
+        """
+        if spans is None:
+            spans = [(0, len(samples))]
+        options = self._call_options(language)
+        chunks = self.plan_chunks(samples, spans)
+        self.stats = {
+            'chunks': len(chunks),
+            'workers': self.max_workers if len(chunks) > 1 else 1
+        }
+        if not chunks:
+            return {'text': '', 'segments': []}
+
+        if len(chunks) > 1 and self.max_workers > 1:
+            results = self._run_parallel(samples, chunks, options)
+            if results is not None:
+                return self._stitch(chunks, results)
+            self.stats['workers'] = 1
+
+        return self._stitch(chunks, self._transcribe_serial(samples, chunks, options))
+
+    def transcribe_stream(self, blocks, vad=None, window_duration=120.0, language=None):
+        """
+        Транскрибация записи, которая поступает блоками (например, во время загрузки)
+        
+        Накопленные отсчеты режутся в тихих точках на окна около
+        window_duration секунд. Каждое окно сразу проходит VAD, разбивается на
+        куски и уходит в пул, не дожидаясь конца записи.
+        
+        Args:
+            blocks (iterable): Последовательные блоки отсчетов float32 16kHz
+            vad (VoiceActivityDetector, optional): Детектор речи для окон; один
+                на всю запись, уровень шума переносится между окнами
+            window_duration (float): Длина окна в секундах
+            language (str, optional): Язык речи для этого вызова вместо options
+            
+        Returns:
+            dict: 'text' и 'segments' по порядку с временем всей записи
+        """
+        options = self._call_options(language)
+        window_samples = max(int(window_duration * SAMPLE_RATE), self.chunk_samples)
+        buffer = np.empty(window_samples + self.search_samples + SAMPLE_RATE * 10, dtype=np.float32)
+        filled = 0
+        offset = 0
+        windows = []
+        vad_stats = {'duration': 0.0, 'speech_duration': 0.0, 'regions': 0}
+        self.stats = {'chunks': 0, 'workers': 1, 'windows': 0}
+        started = time.perf_counter()
+        
+        for block in blocks:
+            if filled + len(block) > len(buffer):
+                grown = np.empty(max(len(buffer) * 2, filled + len(block)), dtype=np.float32)
+                grown[:filled] = buffer[:filled]
+                buffer = grown
+            buffer[filled:filled + len(block)] = block
+            filled += len(block)
+            
+            while filled >= window_samples + self.search_samples:
+                cut = self._find_cut(buffer, window_samples - self.search_samples, window_samples) or window_samples
+                windows.append(self._submit_window(buffer[:cut].copy(), offset, vad, vad_stats, options))
+                if not self.stats.get('first_window_at'):
+                    self.stats['first_window_at'] = round(time.perf_counter() - started, 2)
+                buffer[:filled - cut] = buffer[cut:filled]
+                filled -= cut
+                offset += cut
+                
+        if filled:
+            windows.append(self._submit_window(buffer[:filled].copy(), offset, vad, vad_stats, options))
+            
+        chunks = []
+        results = []
+        for window in windows:
+            chunks.extend(window['chunks'])
+            results.extend(self._collect_window(window))
+            
+        self.stats['windows'] = len(windows)
+        self.stats['chunks'] = len(chunks)
+        self.stats['audio_seconds'] = round((offset + filled) / SAMPLE_RATE, 2)
+        if vad is not None:
+            speech = vad_stats['speech_duration']
+            vad_stats['skipped_fraction'] = round(1 - speech / vad_stats['duration'], 4) if vad_stats['duration'] else 0.0
+            vad.stats = {key: round(value, 2) if isinstance(value, float) else value for key, value in vad_stats.items()}
+        return self._stitch(chunks, results)
+        
+    def _submit_window(self, samples, offset, vad, vad_stats, options):
+        """Разбивка окна на куски и отправка в пул (или распознавание на месте)"""
+        spans = [(0, len(samples))]
+        if vad is not None:
+            spans = vad.detect(samples)
+            for key in ('duration', 'speech_duration', 'regions'):
+                vad_stats[key] += vad.stats.get(key, 0)
+                
+        window = {
+            'samples': samples,
+            'offset': offset,
+            'chunks': self.plan_chunks(samples, spans),
+            'options': options
+        }
+        if not window['chunks']:
+            window['results'] = []
+            return window
+            
+        if self.max_workers > 1 and not self.stats.get('pool_failed'):
+            path = None
+            try:
+                fd, path = tempfile.mkstemp(suffix='.pcm', dir=self.temp_dir)
+                with os.fdopen(fd, 'wb') as f:
+                    samples.tofile(f)
+                pool = self._get_pool()
+                window['path'] = path
+                window['futures'] = [
+                    pool.submit(_transcribe_shared, path, len(samples), chunk['pieces'], options)
+                    for chunk in window['chunks']
+                ]
+                self.stats['workers'] = self.max_workers
+                return window
+            except Exception as e:
+                logger.warning(f"Parallel transcription unavailable, running serially: {e}")
+                self._remove(path)
+                self.shutdown()
+                self.stats['pool_failed'] = True
+                self.stats['workers'] = 1
+                
+        window['results'] = self._transcribe_serial(samples, window['chunks'], options)
+        return window
+        
+    def _collect_window(self, window):
+        """Результаты кусков окна со временем всей записи"""
+        results = window.get('results')
+        if results is None:
+            try:
+                results = [future.result() for future in window['futures']]
+            except Exception as e:
+                logger.warning(f"Parallel transcription failed, running window serially: {e}")
+                self.shutdown()
+                results = self._transcribe_serial(window['samples'], window['chunks'], window['options'])
+            finally:
+                self._remove(window['path'])
+                
+        shift = window['offset'] / SAMPLE_RATE
+        return [
+            {
+                'text': result['text'],
+                'segments': [
+                    dict(segment, start=segment['start'] + shift, end=segment['end'] + shift)
+                    for segment in result['segments']
+                ]
+            }
+            for result in results
+        ]
+        
+    def _call_options(self, language=None):
+        """Параметры model.transcribe с языком конкретного вызова"""
+        if not language:
+            return self.options
+        return dict(self.options, language=language)
+        
+    def _transcribe_serial(self, samples, chunks, options):
+        model = ModelRegistry.whisper(self.model_name, self.device, self.compute_type)
+        return [_transcribe_pieces(model, samples, chunk['pieces'], options) for chunk in chunks]
+        
+    def _remove(self, path):
+        if path is None:
+            return
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+            
+    def plan_chunks(self, samples, spans):
+        """
+        Разбиение участков на куски не длиннее chunk_duration
+
+        Длинные участки режутся в самой тихой точке окна перед границей, с
+        перекрытием overlap. Соседние короткие участки склеиваются в один
+        кусок, чтобы не тратить окно Whisper на каждую фразу.
+
+        Returns:
+            list: Куски {'pieces': [(начало, конец), ...], 'overlap': bool}
+        """
+        pieces = []
+        for start, end in spans:
+            overlap = False
+            while end - start > self.chunk_samples:
+                cut = self._find_cut(samples, start + self.chunk_samples - self.search_samples,
+                                     start + self.chunk_samples)
+                pieces.append((start, cut, overlap))
+                start = max(cut - self.overlap_samples, start + 1)
+                overlap = self.overlap_samples > 0
+            if end > start:
+                pieces.append((start, end, overlap))
+
+        chunks = []
+        length = 0
+        for start, end, overlap in pieces:
+            if overlap or not chunks or length + (end - start) > self.chunk_samples:
+                chunks.append({'pieces': [], 'overlap': overlap})
+                length = 0
+            chunks[-1]['pieces'].append((start, end))
+            length += end - start
+        return chunks
+
+    def _find_cut(self, samples, window_start, window_end):
+        """Начало самого тихого 30 мс кадра в окне"""
+        window_start = max(window_start, 0)
+        count = (window_end - window_start) // CUT_FRAME
+        if count <= 0:
+            return window_end
+        frames = np.asarray(samples[window_start:window_start + count * CUT_FRAME]).reshape(count, CUT_FRAME)
+        energy = np.einsum('ij,ij->i', frames, frames)
+        return window_start + int(np.argmin(energy)) * CUT_FRAME
+
+    def _run_parallel(self, samples, chunks, options):
+        """Распределение кусков по пулу; None, если пул недоступен"""
+        fd, path = tempfile.mkstemp(suffix='.pcm', dir=self.temp_dir)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.ascontiguousarray(samples, dtype=np.float32).tofile(f)
+
+            pool = self._get_pool()
+            futures = [
+                pool.submit(_transcribe_shared, path, len(samples), chunk['pieces'], options)
+                for chunk in chunks
+            ]
+            return [future.result() for future in futures]
+        except Exception as e:
+            # Например, в демонизированном воркере Celery нельзя создать дочерние процессы
+            logger.warning(f"Parallel transcription unavailable, running serially: {e}")
+            self.shutdown()
+            return None
+        finally:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+    def _get_pool(self):
+        if self._pool is None:
+            threads = max(1, (os.cpu_count() or 1) // self.max_workers)
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(self.model_name, self.device, self.compute_type, threads)
+            )
+            logger.info(f"Started transcription pool: {self.max_workers} workers x {threads} threads")
+        return self._pool
+
+    def _stitch(self, chunks, results):
+        """Склейка результатов кусков по порядку без дублей на перекрытиях"""
+        texts = []
+        segments = []
+        last_end = 0.0
+        for chunk, result in zip(chunks, results):
+            chunk_segments = result['segments']
+            if chunk['overlap'] and segments:
+                # Сегменты, целиком попавшие в уже распознанное время, дублируются
+                chunk_segments = [s for s in chunk_segments if s['end'] > last_end + 0.1]
+                if chunk_segments:
+                    first = dict(chunk_segments[0])
+                    first['text'] = _strip_repeated_words(segments[-1]['text'], first['text'])
+                    chunk_segments = [first] + chunk_segments[1:]
+                text = ''.join(s['text'] for s in chunk_segments)
+            else:
+                text = result['text']
+
+            segments.extend(s for s in chunk_segments if s['text'].strip())
+            if segments:
+                last_end = max(last_end, segments[-1]['end'])
+            if text.strip():
+                texts.append(text.strip())
+        return {'text': ' '.join(texts), 'segments': segments}
+
+    def shutdown(self):
+        """Остановка пула процессов"""
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+def _strip_repeated_words(previous, text, max_words=8):
+    """Удаление из начала text слов, которыми заканчивается previous"""
+    previous_words = previous.split()
+    words = text.split()
+    normalize = lambda w: w.strip('.,!?;:"\'').lower()
+    for n in range(min(max_words, len(previous_words), len(words)), 0, -1):
+        if [normalize(w) for w in previous_words[-n:]] == [normalize(w) for w in words[:n]]:
+            return ' ' + ' '.join(words[n:]) if words[n:] else ''
+    return text
@@ -0,0 +1,246 @@
+import itertools
+import json
+import logging
+import subprocess
+import tempfile
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+def probe_streams(path, timeout=30):
+    """
+    Получение информации о потоках и контейнере через ffprobe
+
+    Args:
+        path (str): Путь к медиафайлу
+
+    Returns:
+        dict: Ответ ffprobe с ключами 'streams' и 'format'
+    """
+    command = [
+        'ffprobe',
+        '-v', 'error',
+        '-print_format', 'json',
+        '-show_streams',
+        '-show_format',
+        str(path)
+    ]
+    result = subprocess.run(command, capture_output=True, text=True, timeout=timeout)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffprobe failed: {result.stderr.strip()}")
+    return json.loads(result.stdout or '{}')
+
+def keyframe_times(path, timeout=300):
+    """
+    Времена ключевых кадров по индексу контейнера (без декодирования)
+
+    Args:
+        path (str): Путь к видео файлу
+
+    Returns:
+        list: Отсортированные времена ключевых кадров в секундах
+    """
+    command = [
+        'ffprobe',
+        '-v', 'error',
+        '-select_streams', 'v:0',
+        '-show_entries', 'packet=pts_time,dts_time,flags',
+        '-of', 'compact=p=0',
+        str(path)
+    ]
+    result = subprocess.run(command, capture_output=True, text=True, timeout=timeout)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffprobe failed: {result.stderr.strip()}")
+
+    times = []
+    for line in result.stdout.splitlines():
+        fields = dict(item.partition('=')[::2] for item in line.split('|'))
+        if 'K' not in fields.get('flags', ''):
+            continue
+        for key in ('pts_time', 'dts_time'):
+            try:
+                times.append(float(fields[key]))
+                break
+            except (KeyError, ValueError):
+                continue
+    return sorted(times)
+
+def _parse_rate(rate):
+    """Преобразование частоты вида '30000/1001' в число"""
+    try:
+        numerator, _, denominator = str(rate).partition('/')
+        value = float(numerator) / float(denominator or 1)
+        return value if value > 0 else 0.0
+    except (ValueError, ZeroDivisionError):
+        return 0.0
+
+class FFmpegFrameReader:
+    def __init__(self, video_path, max_resolution=None, buffer_count=4, info=None):
+        """
+        Чтение кадров rgb24 из ffmpeg через pipe
+
+        Масштабирование и выборка кадров выполняются фильтрами ffmpeg, в Python
+        приходят только нужные кадры уменьшенного размера.
+
+        Args:
+            video_path (str): Путь к видео файлу
+            max_resolution (int, optional): Максимальная высота кадра
+            buffer_count (int): Размер кольца буферов. Кадр остается валидным,
+                пока не прочитано еще buffer_count кадров.
+            info (dict, optional): Готовый ответ probe_streams()
+        """
+        self.video_path = str(video_path)
+        self.max_resolution = max_resolution
+        self.buffer_count = max(2, int(buffer_count))
+        self._process = None
+        self._stderr = None
+
+        info = info or probe_streams(self.video_path)
+        stream = next(
+            (s for s in info.get('streams', []) if s.get('codec_type') == 'video'),
+            None
+        )
+        if stream is None:
+            raise RuntimeError(f"No video stream in {self.video_path}")
+
+        self.source_width = int(stream['width'])
+        self.source_height = int(stream['height'])
+        self.fps = _parse_rate(stream.get('avg_frame_rate')) or _parse_rate(stream.get('r_frame_rate')) or 25.0
+
+        duration = float(stream.get('duration') or info.get('format', {}).get('duration') or 0)
+        self.duration = duration
+        self.total_frames = int(stream.get('nb_frames') or 0) or int(duration * self.fps)
+
+        self.width, self.height = self._output_size()
+        self._buffers = np.empty((self.buffer_count, self.height, self.width, 3), dtype=np.uint8)
+
+    def _output_size(self):
+        """Размер кадра после масштабирования (четные стороны)"""
+        width, height = self.source_width, self.source_height
+        if self.max_resolution and height > self.max_resolution:
+            width = int(round(width * self.max_resolution / height / 2)) * 2
+            height = int(self.max_resolution)
+        return max(width, 2), max(height, 2)
+
+    def _build_command(self, filters, input_args=()):
+        """Команда ffmpeg с выводом rawvideo rgb24 в stdout"""
+        command = ['ffmpeg', '-v', 'error', '-nostdin']
+        command += list(input_args)
+        command += ['-i', self.video_path]
+        return command + self._output_args(filters) + ['pipe:1']
+
+    def _output_args(self, filters):
+        """Параметры выхода rawvideo rgb24 (без адреса выхода)"""
+        filters = list(filters)
+        if (self.width, self.height) != (self.source_width, self.source_height):
+            filters.append(f"scale={self.width}:{self.height}:flags=area")
+
+        args = ['-map', '0:v:0', '-an', '-sn']
+        if filters:
+            args += ['-vf', ','.join(filters)]
+        return args + ['-vsync', '0', '-f', 'rawvideo', '-pix_fmt', 'rgb24']
+
+    def _step_filters(self, step, start_frame=0):
+        """Фильтр select для каждого step-го кадра начиная с start_frame"""
+        if step > 1 or start_frame:
+            return [f"select='gte(n\\,{start_frame})*not(mod(n-{start_frame}\\,{step}))'"]
+        return []
+
+    def iter_frames(self, step=1, start_frame=0):
+        """
+        Выборка каждого step-го кадра начиная с start_frame
+
+        Yields:
+            tuple: (индекс кадра в исходном видео, кадр RGB из кольца буферов)
+        """
+        step = max(1, int(step))
+        indices = itertools.count(start_frame, step)
+        command = self._build_command(self._step_filters(step, start_frame))
+        yield from self._read_frames(command, indices)
+
+    def iter_keyframes(self, times):
+        """
+        Декодирование только ключевых кадров (-skip_frame nokey)
+
+        Args:
+            times (list): Времена ключевых кадров из keyframe_times()
+
+        Yields:
+            tuple: (индекс кадра в исходном видео, кадр RGB из кольца буферов)
+        """
+        indices = (int(round(t * self.fps)) for t in times)
+        command = self._build_command([], input_args=['-skip_frame', 'nokey'])
+        yield from self._read_frames(command, indices)
+
+    def iter_range(self, start_time, end_time, sample_fps):
+        """
+        Кадры отрезка [start_time, end_time) с частотой sample_fps
+
+        Yields:
+            tuple: (индекс кадра в исходном видео, кадр RGB из кольца буферов)
+        """
+        duration = max(end_time - start_time, 0)
+        input_args = ['-ss', f"{start_time:.3f}", '-t', f"{duration:.3f}"]
+        indices = (
+            int(round((start_time + n / sample_fps) * self.fps))
+            for n in itertools.count()
+        )
+        command = self._build_command([f"fps={sample_fps}"], input_args=input_args)
+        yield from self._read_frames(command, indices)
+
+    def _read_frames(self, command, indices):
+        """Чтение кадров из stdout ffmpeg в предвыделенные буферы"""
+        self.close()
+        logger.info(f"Running command: {' '.join(command)}")
+        self._stderr = tempfile.TemporaryFile()
+        self._process = subprocess.Popen(
+            command,
+            stdout=subprocess.PIPE,
+            stderr=self._stderr,
+            bufsize=self.width * self.height * 3
+        )
+
+        slot = 0
+        try:
+            for frame_idx in indices:
+                buffer = self._buffers[slot]
+                if not self._read_into(memoryview(buffer).cast('B')):
+                    break
+                yield frame_idx, buffer
+                slot = (slot + 1) % self.buffer_count
+        finally:
+            self.close()
+
+    def _read_into(self, view, stream=None):
+        """Чтение ровно одного кадра; False при конце потока"""
+        stream = stream or self._process.stdout
+        filled = 0
+        while filled < len(view):
+            read = stream.readinto(view[filled:])
+            if not read:
+                if filled:
+                    logger.warning(f"Truncated frame: {filled} of {len(view)} bytes")
+                return False
+            filled += read
+        return True
+
+    def close(self):
+        """Остановка процесса ffmpeg"""
+        process, self._process = self._process, None
+        if process is not None:
+            try:
+                if process.poll() is None:
+                    process.kill()
+                process.stdout.close()
+                process.wait(timeout=10)
+                if process.returncode not in (0, -9) and self._stderr is not None:
+                    self._stderr.seek(0)
+                    error = self._stderr.read().decode(errors='replace').strip()
+                    if error:
+                        logger.error(f"FFmpeg decoder failed: {error}")
+            except Exception as e:
+                logger.warning(f"Error stopping ffmpeg decoder: {e}")
+        if self._stderr is not None:
+            self._stderr.close()
+            self._stderr = None
@@ -0,0 +1,284 @@
+import os
+import json
+import uuid
+import fcntl
+import shutil
+import hashlib
+import logging
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Размер блоков для выборочного хэша содержимого файла
+HASH_BLOCK_SIZE = 1024 * 1024
+HASH_SAMPLE_SIZE = 64 * 1024
+HASH_SAMPLES = 16
+
+def file_fingerprint(path):
+    """
+    Хэш содержимого файла по выборке блоков
+
+    Учитываются размер файла, первый и последний мегабайт и равномерно
+    распределенные блоки по 64KB, поэтому большие видео не читаются целиком.
+
+    Returns:
+        str: Hex SHA-256
+    """
+    size = os.path.getsize(path)
+    digest = hashlib.sha256(str(size).encode())
+
+    with open(path, 'rb') as f:
+        digest.update(f.read(HASH_BLOCK_SIZE))
+        if size > 2 * HASH_BLOCK_SIZE:
+            step = (size - 2 * HASH_BLOCK_SIZE) // (HASH_SAMPLES + 1)
+            for i in range(1, HASH_SAMPLES + 1):
+                f.seek(HASH_BLOCK_SIZE + i * step)
+                digest.update(f.read(HASH_SAMPLE_SIZE))
+        if size > HASH_BLOCK_SIZE:
+            f.seek(max(size - HASH_BLOCK_SIZE, HASH_BLOCK_SIZE))
+            digest.update(f.read(HASH_BLOCK_SIZE))
+
+    return digest.hexdigest()
+
+def _text_hash(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+def _slug(key):
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+
+def _atomic_write(path, write):
+    """Запись файла через временный файл и os.replace"""
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+class FrameCache:
+    def __init__(self, cache_dir, max_size_mb=1000):
+        """
+        Дисковый кэш кадров, описаний и эмбеддингов
+
+        Записи лежат в cache_dir/<хэш видео>/ и вытесняются по LRU, когда
+        общий размер превышает max_size_mb.
+
+        Args:
+            cache_dir (str): Директория кэша кадров
+            max_size_mb (int): Лимит размера кэша в мегабайтах
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+
+    @classmethod
+    def from_config(cls, app_config):
+        """Создание кэша по секции storage конфигурации"""
+        storage = app_config.get('storage', {})
+        cache_dir = storage.get('cache_dir') or app_config.get('paths', {}).get('cache_dir', '/app/cache')
+        return cls(
+            Path(cache_dir) / 'frames',
+            max_size_mb=storage.get('cache_size_mb', 1000)
+        )
+
+    def entry(self, video_path):
+        """Запись кэша для видео по хэшу его содержимого"""
+        video_hash = file_fingerprint(video_path)
+        return FrameCacheEntry(self, self.cache_dir / video_hash)
+
+    def evict(self, keep=None):
+        """Удаление давно не использованных записей сверх лимита размера"""
+        entries = []
+        for entry_dir in self.cache_dir.iterdir():
+            if not entry_dir.is_dir():
+                continue
+            files = [f for f in entry_dir.iterdir() if f.is_file()]
+            size = sum(f.stat().st_size for f in files)
+            index = entry_dir / 'index.json'
+            accessed = index.stat().st_mtime if index.exists() else 0
+            entries.append((accessed, size, entry_dir))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry_dir in sorted(entries, key=lambda item: item[0]):
+            if total <= self.max_size_bytes:
+                break
+            if keep is not None and entry_dir == keep:
+                continue
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total -= size
+            logger.info(f"Evicted frame cache entry {entry_dir.name} ({size / 1024 / 1024:.1f}MB)")
+
+class FrameCacheEntry:
+    def __init__(self, cache, path):
+        """Кэш одного видео: кандидаты, JPEG, описания и эмбеддинги"""
+        self.cache = cache
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._index_path = self.path / 'index.json'
+        self._shards = {}
+        self._dirty = False
+
+        self._index = self._read_index()
+        if self._index_path.exists():
+            # Отмечаем обращение для LRU
+            try:
+                os.utime(self._index_path)
+            except OSError:
+                pass
+
+    def load_frames(self, signature, caption_key, screenshots_dir):
+        """
+        Восстановление кадров-кандидатов без декодирования и инференса
+
+        Returns:
+            list: Кадры или None, если в кэше чего-то не хватает
+        """
+        candidates = self._index['candidates'].get(signature)
+        if candidates is None:
+            return None
+
+        captions = self._index['captions'].get(caption_key, {})
+        frames = []
+        for frame_idx, timestamp in candidates:
+            image_path = self.frame_image(signature, frame_idx)
+            if image_path is None or str(frame_idx) not in captions:
+                return None
+            output_path = Path(screenshots_dir) / f"frame_{frame_idx}.jpg"
+            shutil.copyfile(image_path, output_path)
+            frames.append({
+                'path': str(output_path),
+                'index': frame_idx,
+                'timestamp': timestamp,
+                'caption': captions[str(frame_idx)]
+            })
+        return frames
+
+    def store_candidates(self, signature, frames):
+        """
+        Сохранение кадров-кандидатов (индекс, время) и их JPEG
+
+        JPEG зависят от параметров выборки (разрешение, декодер, отрезки),
+        поэтому лежат отдельно для каждой сигнатуры.
+        """
+        for frame in frames:
+            shutil.copyfile(frame['path'], self._image_path(signature, frame['index']))
+        self._index['candidates'][signature] = [
+            [frame['index'], frame.get('timestamp')] for frame in frames
+        ]
+        self._dirty = True
+
+    def frame_image(self, signature, frame_idx):
+        """Путь к JPEG кадра в кэше или None"""
+        path = self._image_path(signature, frame_idx)
+        return path if path.exists() else None
+
+    def _image_path(self, signature, frame_idx):
+        return self.path / f"frame-{_slug(signature)}-{frame_idx}.jpg"
+
+    def captions(self, caption_key):
+        """Описания кадров для модели: {индекс кадра (str): описание}"""
+        return self._index['captions'].get(caption_key, {})
+
+    def put_caption(self, caption_key, frame_idx, caption):
+        self._index['captions'].setdefault(caption_key, {})[str(frame_idx)] = caption
+        self._dirty = True
+
+    def embed(self, model_key, texts, encode):
+        """
+        Эмбеддинги текстов с дозаполнением кэша
+
+        Эмбеддинг описания кадра однозначно определяется описанием, поэтому
+        строки адресуются хэшем текста: {хэш: [файл, строка]}. Новые строки
+        дописываются отдельным .npy файлом, уже записанные файлы не
+        переписываются и читаются через memory map.
+
+        Args:
+            model_key (str): Модель эмбеддингов и тип данных
+            texts (list): Тексты для кодирования
+            encode (callable): Функция кодирования списка текстов в матрицу
+
+        Returns:
+            np.ndarray: Матрица (len(texts), dim)
+        """
+        if not texts:
+            return encode([])
+
+        rows = self._index['embeddings'].setdefault(model_key, {})
+        hashes = [_text_hash(text) for text in texts]
+
+        missing = {}
+        for text, text_hash in zip(texts, hashes):
+            location = rows.get(text_hash)
+            # Строки старого формата (номер в общей матрице) пересчитываются
+            stale = not isinstance(location, list) or self._shard(location[0]) is None
+            if stale and text_hash not in missing:
+                missing[text_hash] = text
+
+        if missing:
+            new_rows = np.ascontiguousarray(encode(list(missing.values())))
+            name = f"embeddings-{_slug(model_key)}-{uuid.uuid4().hex[:12]}.npy"
+            _atomic_write(self.path / name, lambda f: np.save(f, new_rows))
+            self._shards[name] = new_rows
+            for row, text_hash in enumerate(missing):
+                rows[text_hash] = [name, row]
+            self._dirty = True
+
+        return np.stack([self._shard(rows[h][0])[rows[h][1]] for h in hashes])
+
+    def _shard(self, name):
+        """Файл строк эмбеддингов (memory map) или None, если его нет"""
+        if name not in self._shards:
+            path = self.path / name
+            try:
+                self._shards[name] = np.load(path, mmap_mode='r')
+            except (OSError, ValueError):
+                self._shards[name] = None
+        return self._shards[name]
+
+    def save(self):
+        """
+        Запись индекса и вытеснение старых записей при необходимости
+
+        Индекс может одновременно обновлять другой воркер, поэтому под
+        блокировкой файла индекс перечитывается с диска и объединяется с
+        изменениями этого процесса.
+        """
+        if not self._dirty:
+            return
+        with open(self.path / 'index.lock', 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                index = self._read_index()
+                for section, values in self._index.items():
+                    merged = index.setdefault(section, {})
+                    for key, value in values.items():
+                        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+                            merged[key].update(value)
+                        else:
+                            merged[key] = value
+                data = json.dumps(index, ensure_ascii=False).encode('utf-8')
+                _atomic_write(self._index_path, lambda f: f.write(data))
+                self._index = index
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+        self._dirty = False
+        self.cache.evict(keep=self.path)
+
+    def _read_index(self):
+        """Индекс с диска (пустой, если его нет или он поврежден)"""
+        index = {'candidates': {}, 'captions': {}, 'embeddings': {}}
+        if self._index_path.exists():
+            try:
+                with open(self._index_path, 'r', encoding='utf-8') as f:
+                    index.update(json.load(f))
+            except Exception as e:
+                logger.warning(f"Corrupted frame cache index {self._index_path}: {e}")
+        return index
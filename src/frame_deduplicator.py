@@ -0,0 +1,111 @@
+import logging
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Количество единичных битов для каждого значения байта
+POPCOUNT_TABLE = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+class FrameDeduplicator:
+    def __init__(self, method='phash', max_distance=6, capacity=256, rgb=False):
+        """
+        Отсев почти одинаковых кадров по перцептивному хэшу
+
+        Args:
+            method (str): 'phash' (DCT) или 'dhash' (градиент)
+            max_distance (int): Максимальное расстояние Хэмминга для дубликата
+            capacity (int): Начальный размер массива хэшей
+            rgb (bool): Кадры в порядке RGB, а не BGR
+        """
+        if method not in ('phash', 'dhash'):
+            raise ValueError(f"Unknown hash method: {method}")
+        self.method = method
+        self.max_distance = max_distance
+        self.rgb = rgb
+        self._hashes = np.empty(capacity, dtype=np.uint64)
+        self.reset()
+
+    @classmethod
+    def from_config(cls, config, rgb=False):
+        """Создание дедупликатора из секции video_processing конфигурации"""
+        return cls(
+            method=config.get('dedup_method', 'phash'),
+            max_distance=config.get('dedup_distance', 6),
+            rgb=rgb
+        )
+
+    def reset(self):
+        """Сброс сохраненных хэшей и статистики перед новым видео"""
+        self._count = 0
+        self.checked = 0
+        self.dropped = 0
+
+    def is_duplicate(self, frame):
+        """
+        Проверка кадра на дубликат уже оставленного кадра
+
+        Если кадр не дубликат, его хэш запоминается.
+
+        Args:
+            frame (np.ndarray): Кадр BGR или RGB
+
+        Returns:
+            bool: True, если кадр нужно отбросить
+        """
+        frame_hash = self.compute_hash(frame)
+        self.checked += 1
+
+        if self._count and self.min_distance(frame_hash) <= self.max_distance:
+            self.dropped += 1
+            return True
+
+        self._append(frame_hash)
+        return False
+
+    def min_distance(self, frame_hash):
+        """Минимальное расстояние Хэмминга до сохраненных хэшей"""
+        xor = self._hashes[:self._count] ^ np.uint64(frame_hash)
+        if hasattr(np, 'bitwise_count'):
+            distances = np.bitwise_count(xor)
+        else:
+            distances = POPCOUNT_TABLE[xor.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+        return int(distances.min())
+
+    def compute_hash(self, frame):
+        """64-битный перцептивный хэш кадра"""
+        if frame.ndim == 2:
+            gray = frame
+        else:
+            gray = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY if self.rgb else cv2.COLOR_BGR2GRAY)
+
+        if self.method == 'dhash':
+            small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+            bits = small[:, 1:] > small[:, :-1]
+        else:
+            small = cv2.resize(gray, (32, 32), interpolation=cv2.INTER_AREA)
+            dct = cv2.dct(small.astype(np.float32))[:8, :8]
+            # Постоянную составляющую не учитываем при расчете медианы
+            bits = dct > np.median(dct.ravel()[1:])
+
+        return int(np.packbits(bits.ravel()).view('>u8')[0])
+
+    def report(self):
+        """Статистика отсева для текущего видео"""
+        return {
+            'checked': self.checked,
+            'dropped': self.dropped,
+            'kept': self.checked - self.dropped,
+            'method': self.method,
+            'max_distance': self.max_distance
+        }
+
+    def _append(self, frame_hash):
+        """Добавление хэша с увеличением массива при необходимости"""
+        if self._count == len(self._hashes):
+            grown = np.empty(len(self._hashes) * 2, dtype=np.uint64)
+            grown[:self._count] = self._hashes
+            self._hashes = grown
+        self._hashes[self._count] = frame_hash
+        self._count += 1
@@ -1,12 +1,28 @@
 import cv2
+import json
+import time
 import logging
+import numpy as np
 from PIL import Image
 import torch
-from transformers import pipeline
 from sklearn.metrics.pairwise import cosine_similarity
-from sentence_transformers import SentenceTransformer
 import yaml
 from pathlib import Path
+from contextlib import ExitStack
+
+from .model_registry import ModelRegistry
+from .scene_detector import SceneDetector
+from .frame_deduplicator import FrameDeduplicator
+from .ffmpeg_decoder import FFmpegFrameReader
+from .keyframe_scanner import KeyframeScanner
+from .frame_cache import FrameCache
+from .transcript import TranscriptSegments
+
+# Границы порога перехода на seek (в кадрах)
+MIN_SEEK_THRESHOLD = 30
+MAX_SEEK_THRESHOLD = 3000
+# Количество grab() для замера стоимости последовательного чтения
+SEEK_PROBE_GRABS = 15
 
 class FrameProcessor:
     def __init__(self, output_dir, max_frames=10, mode='scenes', 
@@ -17,18 +33,28 @@ class FrameProcessor:
         self.blip_enabled = blip_enabled
         self.max_caption_length = max_caption_length
         self.logger = logging.getLogger(__name__)
-        self.config = self._load_config()
+        self.app_config = self._load_config()
+        self.config = self.app_config.get('video_processing', {})
+        self.blip_config = self.app_config.get('blip', {})
+        self.embedding_config = self.app_config.get('embeddings', {})
+        self.transcript = TranscriptSegments()
+        self.text_segments = []
+        self.video_fps = None
+        # Загруженные отрезки видео текущей задачи ({'path', 'start', 'end'})
+        self.clips = []
+        self.frame_embeddings = None
+        self.segment_embeddings = None
+        self.frame_cache = None
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.last_stats = {}
+        # Порядок каналов кадров текущего источника (ffmpeg отдает RGB)
+        self.frames_rgb = False
         
         # Создание директорий
         self.screenshots_dir = self.output_dir / 'screenshots'
         self.screenshots_dir.mkdir(exist_ok=True)
         
-        # Инициализация моделей
-        self._initialize_models()
-        
-        # Добавляем CLIP для лучшего сопоставления текста и изображений
-        self.clip_model = self._initialize_clip()
+        # Модели загружаются лениво через общий ModelRegistry
 
     def _load_config(self):
         """Загрузка конфигурации"""
@@ -39,116 +65,557 @@ class FrameProcessor:
                 
             with open(config_path, 'r') as f:
                 config = yaml.safe_load(f)
-            return config.get('video_processing', {})
+            return config or {}
         except Exception as e:
             self.logger.error(f"Error loading config: {e}")
             return {}
 
-    def _initialize_models(self):
-        """Инициализация ML моделей"""
+    @property
+    def caption_model(self):
+        """Пайплайн BLIP из общего реестра моделей"""
+        model_name = self.blip_config.get('model', 'Salesforce/blip-image-captioning-base')
+        return ModelRegistry.caption_pipeline(model_name, self.device)
+
+    @property
+    def embedding_model(self):
+        """SentenceTransformer из общего реестра моделей"""
+        model_name = self.embedding_config.get('model', 'all-MiniLM-L6-v2')
+        return ModelRegistry.sentence_transformer(model_name, self.device)
+
+    def process(self, video_path, text_segments=None, mode=None, candidates=None, clips=None):
+        """
+        Обработка видео и извлечение кадров
+        
+        Args:
+            video_path (str): Путь к видео файлу
+            text_segments (TranscriptSegments или list, optional): Сегменты
+                транскрипции для выбора кадров
+            mode (str, optional): Режим выбора кадров для этой задачи
+                ('interval', 'scenes' или 'keyframes'); по умолчанию self.mode
+            candidates (list, optional): Кадры-кандидаты, уже полученные
+                collect_candidates(); тогда видео не читается повторно
+            clips (list, optional): Отрезки видео {'path', 'start', 'end'},
+                если загружено не все видео; индексы и время кадров
+                пересчитываются во время исходного видео
+            
+        Returns:
+            list: Выбранные кадры
+        """
+        mode = mode or self.mode
+        self.clips = list(clips or [])
+        if candidates is None:
+            self.last_stats = {}
+        if isinstance(text_segments, TranscriptSegments):
+            self.transcript = text_segments
+        else:
+            texts = list(text_segments or [])
+            self.transcript = TranscriptSegments(np.full(len(texts), np.nan), np.full(len(texts), np.nan), texts)
+        self.text_segments = list(self.transcript.texts)
+        cache_entry = self._open_cache_entry(video_path)
         try:
-            if self.blip_enabled:
-                self.caption_model = pipeline(
-                    "image-to-text", 
-                    model="Salesforce/blip-image-captioning-base",
-                    device=self.device
-                )
+            frames = candidates
+            if frames is None:
+                frames = self._load_candidates(video_path, mode, cache_entry)
+                
+            # Один проход эмбеддинга по всем описаниям и сегментам видео,
+            # только если выбор пойдет по сходству текстов
+            self.frame_embeddings = None
+            self.segment_embeddings = None
+            if self._needs_embeddings(frames):
+                self._embed_frames(frames, cache_entry)
             
-            self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
-            self.embedding_model.to(self.device)
+            if cache_entry is not None:
+                cache_entry.save()
+
+            return self._select_most_relevant_frames(frames)
             
         except Exception as e:
-            self.logger.error(f"Error initializing models: {e}")
+            self.logger.error(f"Error processing video: {e}")
             raise
 
-    def _initialize_clip(self):
-        """Инициализация CLIP модели"""
-        try:
-            import clip
-            model, preprocess = clip.load("ViT-B/32", device=self.device)
-            return {"model": model, "preprocess": preprocess}
-        except ImportError:
-            self.logger.warning("CLIP module not installed, some features will be disabled")
-            return None
-        except Exception as e:
-            self.logger.error(f"Error loading CLIP: {e}")
-            return None
+    def collect_candidates(self, video_path, mode=None, media_reader=None, clips=None):
+        """
+        Кадры-кандидаты без выбора по транскрипции
+        
+        Используется при общем проходе MediaReader: кадры читаются из того же
+        процесса ffmpeg, что и аудио, пока транскрипция еще не готова. При
+        попадании в кэш кадров media_reader не запускается.
+        
+        Args:
+            video_path (str): Путь к видео файлу
+            mode (str, optional): Режим выбора кадров
+            media_reader (MediaReader, optional): Источник кадров
+            clips (list, optional): Отрезки видео, как в process()
+            
+        Returns:
+            list: Кадры-кандидаты для process(candidates=...)
+        """
+        mode = mode or self.mode
+        # Процессор общий для задач воркера: отрезки прошлого видео не должны
+        # попасть в сигнатуру кэша кадров
+        self.clips = list(clips or [])
+        self.last_stats = {}
+        cache_entry = self._open_cache_entry(video_path)
+        frames = self._load_candidates(video_path, mode, cache_entry, media_reader)
+        if cache_entry is not None:
+            cache_entry.save()
+        return frames
+
+    def _load_candidates(self, video_path, mode, cache_entry=None, media_reader=None):
+        """Кандидаты из кэша кадров или из видео с записью в кэш"""
+        decoder = 'ffmpeg' if media_reader is not None else None
+        signature = self._candidate_signature(mode, decoder)
+        frames = None
+        if cache_entry is not None:
+            frames = cache_entry.load_frames(signature, self._caption_key(), self.screenshots_dir)
+            
+        if frames is not None:
+            self.logger.info(f"Loaded {len(frames)} candidate frames from cache for {video_path}")
+            self.last_stats['frame_cache'] = 'hit'
+            return frames
+            
+        frames = self._extract_candidates(video_path, mode, cache_entry, media_reader)
+        if cache_entry is not None:
+            cache_entry.store_candidates(signature, frames)
+            self.last_stats['frame_cache'] = 'miss'
+        return frames
 
-    def process(self, video_path):
-        """Обработка видео и извлечение кадров"""
+    def _extract_candidates(self, video_path, mode, cache_entry=None, media_reader=None):
+        """Декодирование, выбор сцен, отсев дубликатов и описание кадров"""
         frames = []
-        cap = None
+        stack = ExitStack()
+        scanner = None
+        self.video_fps = None
+        if mode == 'keyframes' and self.clips:
+            # В коротких отрезках ключевых кадров мало, выбор идет по сценам
+            mode = 'scenes'
         try:
-            cap = cv2.VideoCapture(video_path)
-            if not cap.isOpened():
-                raise RuntimeError("Error opening video file")
-
-            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            fps = cap.get(cv2.CAP_PROP_FPS)
+            if mode == 'keyframes':
+                # Быстрый режим: декодируются только ключевые кадры
+                scanner = KeyframeScanner.from_config(self.config)
+                frame_source = scanner.iter_scenes(video_path, self.config.get('max_resolution'))
+                self.frames_rgb = True
+            else:
+                frame_source, fps = self._open_frame_source(video_path, stack, mode, media_reader)
+                
+                if mode == 'scenes':
+                    detector = SceneDetector.from_config(self.config, rgb=self.frames_rgb)
+                    frame_source = detector.iter_scenes(frame_source, fps)
             
-            frame_indices = self._get_frame_indices(total_frames, fps)
+            deduplicator = None
+            if self.config.get('dedup_enabled', True):
+                deduplicator = FrameDeduplicator.from_config(self.config, rgb=self.frames_rgb)
             
-            for frame_idx in frame_indices:
-                cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
-                ret, frame = cap.read()
-                
-                if not ret:
+            # Кадры копятся в микро-пачки для пакетного описания BLIP
+            batch_size = max(1, int(self.blip_config.get('batch_size', 8)))
+            pending = []
+            
+            for frame_idx, frame in frame_source:
+                if scanner is not None:
+                    # Частота кадров известна сканеру после открытия видео
+                    self.video_fps = scanner.fps
+                    
+                # Отсев почти одинаковых кадров до записи JPEG и инференса
+                if deduplicator is not None and deduplicator.is_duplicate(frame):
                     continue
                     
                 try:
                     processed_frame = self._process_frame(frame, frame_idx)
                     if processed_frame:
-                        frames.append(processed_frame)
+                        pending.append(processed_frame)
                 except Exception as e:
                     self.logger.error(f"Error processing frame {frame_idx}: {e}")
                     continue
+                    
+                if len(pending) >= batch_size:
+                    frames.extend(self._complete_frames(pending, cache_entry))
+                    pending = []
+                    
+            if pending:
+                frames.extend(self._complete_frames(pending, cache_entry))
+            
+            if scanner is not None:
+                self.last_stats['keyframe_scan'] = scanner.stats
+                    
+            if deduplicator is not None:
+                self.last_stats['dedup'] = deduplicator.report()
+                self.logger.info(
+                    f"Deduplication for {video_path}: dropped {deduplicator.dropped} "
+                    f"of {deduplicator.checked} frames"
+                )
+                
+            return frames
+        finally:
+            stack.close()
 
-            return self._select_most_relevant_frames(frames)
+    def _open_cache_entry(self, video_path):
+        """Запись дискового кэша кадров для видео или None, если кэш выключен"""
+        if not self.config.get('frame_cache', True):
+            return None
+        try:
+            if self.frame_cache is None:
+                self.frame_cache = FrameCache.from_config(self.app_config)
+            return self.frame_cache.entry(video_path)
+        except Exception as e:
+            self.logger.warning(f"Frame cache unavailable: {e}")
+            return None
+
+    def _candidate_signature(self, mode, decoder=None):
+        """Параметры, от которых зависит набор кадров-кандидатов"""
+        keys = [
+            'decoder', 'max_resolution', 'frame_interval', 'scene_scan_fps',
+            'scene_scan_width', 'scene_threshold', 'scene_sensitivity',
+            'scene_min_length', 'dedup_enabled', 'dedup_method', 'dedup_distance'
+        ]
+        params = {key: self.config.get(key) for key in keys}
+        params['mode'] = mode
+        if decoder:
+            params['decoder'] = decoder
+        if self.clips:
+            params['clips'] = [[clip['start'], clip['end']] for clip in self.clips]
+        return json.dumps(params, sort_keys=True)
+
+    def _caption_key(self):
+        """Модель и параметры, от которых зависят описания кадров"""
+        if not self.blip_enabled:
+            return "none"
+        model_name = self.blip_config.get('model', 'Salesforce/blip-image-captioning-base')
+        return f"{model_name}:{self.max_caption_length}"
+
+    def _embedding_key(self):
+        """Модель и тип данных эмбеддингов"""
+        model_name = self.embedding_config.get('model', 'all-MiniLM-L6-v2')
+        return f"{model_name}:{self.embedding_config.get('dtype', 'float32')}"
+
+    def _open_frame_source(self, video_path, stack, mode, media_reader=None):
+        """
+        Открытие источника кадров согласно video_processing.decoder
+        
+        'opencv' читает кадры BGR через cv2.VideoCapture в полном разрешении.
+        'ffmpeg' получает уменьшенные до max_resolution кадры RGB из ffmpeg,
+        выборка кадров выполняется фильтром select. Переданный media_reader
+        (общий с аудио проход ffmpeg) используется так же, как 'ffmpeg'.
+        
+        Returns:
+            tuple: (генератор пар (индекс, кадр), fps)
+        """
+        decoder = self.config.get('decoder', 'opencv')
+        
+        if self.clips and media_reader is None:
+            return self._open_clip_source(stack, mode)
+            
+        if media_reader is not None or decoder == 'ffmpeg':
+            # Детектор сцен держит представителя сцены, пока читается следующий кадр
+            reader = media_reader or FFmpegFrameReader(
+                video_path,
+                max_resolution=self.config.get('max_resolution'),
+                buffer_count=self.frame_buffer_count()
+            )
+            stack.callback(reader.close)
+            self.frames_rgb = True
+            self.video_fps = reader.fps
             
+            frame_indices = self._get_frame_indices(reader.total_frames, reader.fps, mode)
+            return reader.iter_frames(step=frame_indices.step), reader.fps
+            
+        if decoder != 'opencv':
+            raise ValueError(f"Unknown frame decoder: {decoder}")
+            
+        cap = cv2.VideoCapture(video_path)
+        stack.callback(cap.release)
+        if not cap.isOpened():
+            raise RuntimeError("Error opening video file")
+        self.frames_rgb = False
+        
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        self.video_fps = fps
+        
+        frame_indices = self._get_frame_indices(total_frames, fps, mode)
+        return self._iter_frames(cap, frame_indices, total_frames), fps
+
+    def _open_clip_source(self, stack, mode):
+        """
+        Кадры из загруженных отрезков видео подряд
+        
+        Каждый отрезок читается через ffmpeg; индекс кадра сдвигается на
+        начало отрезка, поэтому время кадра совпадает со временем исходного
+        видео и транскрипции.
+        
+        Returns:
+            tuple: (генератор пар (индекс, кадр), fps)
+        """
+        first = FFmpegFrameReader(
+            self.clips[0]['path'],
+            max_resolution=self.config.get('max_resolution'),
+            buffer_count=self.frame_buffer_count()
+        )
+        stack.callback(first.close)
+        fps = first.fps
+        self.frames_rgb = True
+        self.video_fps = fps
+        
+        def frames():
+            for i, clip in enumerate(self.clips):
+                if i == 0:
+                    reader = first
+                else:
+                    reader = FFmpegFrameReader(
+                        clip['path'],
+                        max_resolution=self.config.get('max_resolution'),
+                        buffer_count=self.frame_buffer_count()
+                    )
+                    stack.callback(reader.close)
+                offset = int(round(clip['start'] * fps))
+                step = self._get_frame_indices(reader.total_frames, fps, mode).step
+                for frame_idx, frame in reader.iter_frames(step=step):
+                    yield offset + frame_idx, frame
+                    
+        return frames(), fps
+
+    def frame_buffer_count(self):
+        """
+        Размер кольца буферов кадров ffmpeg
+        
+        Детектор сцен держит один кадр полного размера (представитель сцены)
+        и читает следующий; третий буфер — запас, пока представитель
+        сохраняется в JPEG.
+        """
+        return 3
+
+    def _get_frame_indices(self, total_frames, fps, mode=None):
+        """
+        Индексы кадров, которые нужно прочитать из видео
+        
+        В режиме 'interval' это кадры через каждые frame_interval секунд.
+        В режиме 'scenes' это кадры для детектора сцен с частотой
+        scene_scan_fps; итоговые кадры выбирает SceneDetector.
+        """
+        fps = fps if fps and fps > 0 else 25
+        mode = mode or self.mode
+        
+        if mode == 'interval':
+            step = int(round(self.config.get('frame_interval', 60) * fps))
+        elif mode == 'scenes':
+            step = int(round(fps / self.config.get('scene_scan_fps', 1.0)))
+        else:
+            raise ValueError(f"Unknown frame mode: {mode}")
+            
+        return range(0, total_frames, max(step, 1))
+
+    def _iter_frames(self, cap, frame_indices, total_frames):
+        """
+        Последовательная выборка кадров за один проход по видео
+        
+        Кадры между нужными индексами пропускаются через grab() без
+        конвертации, retrieve() вызывается только для нужных индексов.
+        Seek используется только когда разрыв до следующего индекса
+        больше измеренного порога.
+        
+        Args:
+            cap (cv2.VideoCapture): Открытое видео
+            frame_indices (iterable): Индексы нужных кадров
+            total_frames (int): Общее количество кадров
+            
+        Yields:
+            tuple: (индекс кадра, кадр в BGR)
+        """
+        indices = sorted(set(int(idx) for idx in frame_indices if idx >= 0))
+        if not indices:
+            return
+            
+        seek_threshold = self._measure_seek_threshold(cap, total_frames)
+        self.logger.info(f"Seek threshold: {seek_threshold} frames")
+        
+        # Индекс кадра, который вернет следующий grab()
+        position = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+        
+        for frame_idx in indices:
+            gap = frame_idx - position
+            if gap < 0 or gap > seek_threshold:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
+                position = frame_idx
+            else:
+                while position < frame_idx:
+                    if not cap.grab():
+                        return
+                    position += 1
+                    
+            if not cap.grab():
+                return
+            position += 1
+            
+            ret, frame = cap.retrieve()
+            if not ret:
+                continue
+            yield frame_idx, frame
+
+    def _measure_seek_threshold(self, cap, total_frames):
+        """
+        Оценка разрыва (в кадрах), начиная с которого seek дешевле grab()
+        
+        Сравнивает среднее время grab() со временем одного seek в середину
+        видео. Значение из конфигурации (seek_threshold) имеет приоритет.
+        """
+        configured = self.config.get('seek_threshold')
+        if configured:
+            return int(configured)
+            
+        try:
+            start = time.perf_counter()
+            grabbed = 0
+            for _ in range(SEEK_PROBE_GRABS):
+                if not cap.grab():
+                    break
+                grabbed += 1
+            if grabbed == 0:
+                return MIN_SEEK_THRESHOLD
+            grab_time = (time.perf_counter() - start) / grabbed
+            
+            start = time.perf_counter()
+            cap.set(cv2.CAP_PROP_POS_FRAMES, max(total_frames // 2, grabbed))
+            cap.grab()
+            seek_time = time.perf_counter() - start
+            
+            if grab_time <= 0:
+                return MAX_SEEK_THRESHOLD
+            threshold = int(seek_time / grab_time)
+            return max(MIN_SEEK_THRESHOLD, min(threshold, MAX_SEEK_THRESHOLD))
         except Exception as e:
-            self.logger.error(f"Error processing video: {e}")
-            raise
+            self.logger.warning(f"Could not measure seek cost: {e}")
+            return MIN_SEEK_THRESHOLD
         finally:
-            if cap is not None:
-                cap.release()
+            # Возвращаемся в начало видео после замера
+            cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
 
     def _process_frame(self, frame, frame_idx):
-        """Обработка отдельного кадра"""
+        """Сохранение отдельного кадра; описание добавляется пачкой позже"""
         try:
-            # Конвертация BGR в RGB
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            # Конвертация BGR в RGB (кадры ffmpeg уже в RGB)
+            frame_rgb = frame if self.frames_rgb else cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
             image = Image.fromarray(frame_rgb)
             
             # Сохранение кадра
             output_path = self.screenshots_dir / f"frame_{frame_idx}.jpg"
             image.save(output_path, quality=85)
             
-            # Генерация описания если включено
-            caption = ""
-            if self.blip_enabled:
-                caption = self._generate_caption(image)
-            
-            # Получение эмбеддинга
-            embedding = self._get_embedding(caption if caption else "")
-            
             return {
                 'path': str(output_path),
                 'index': frame_idx,
-                'caption': caption,
-                'embedding': embedding
+                'timestamp': round(frame_idx / self.video_fps, 3) if self.video_fps else None,
+                'image': image
             }
             
         except Exception as e:
             self.logger.error(f"Error processing frame: {e}")
             return None
 
+    def _complete_frames(self, batch, cache_entry=None):
+        """Добавление описаний для пачки кадров (из кэша, если они там есть)"""
+        caption_key = self._caption_key()
+        cached = cache_entry.captions(caption_key) if cache_entry is not None else {}
+        captions = [cached.get(str(frame['index'])) for frame in batch]
+        
+        missing = [i for i, caption in enumerate(captions) if caption is None]
+        if missing:
+            if self.blip_enabled:
+                generated = self._generate_captions([batch[i]['image'] for i in missing])
+            else:
+                generated = [""] * len(missing)
+            for i, caption in zip(missing, generated):
+                captions[i] = caption
+            
+        for frame, caption in zip(batch, captions):
+            frame.pop('image', None)
+            frame['caption'] = caption
+            if cache_entry is not None:
+                cache_entry.put_caption(caption_key, frame['index'], caption)
+        return batch
+
+    def _generate_captions(self, images):
+        """
+        Пакетная генерация описаний кадров через BLIP
+        
+        Args:
+            images (list): Изображения PIL одной микро-пачки
+            
+        Returns:
+            list: Описания в том же порядке, что и изображения
+        """
+        try:
+            results = self.caption_model(
+                images,
+                batch_size=len(images),
+                generate_kwargs={'max_new_tokens': self.max_caption_length}
+            )
+            
+            captions = []
+            for result in results:
+                # Для списка изображений pipeline возвращает список списков
+                if isinstance(result, list):
+                    result = result[0] if result else {}
+                captions.append(result.get('generated_text', '').strip())
+            return captions
+            
+        except Exception as e:
+            self.logger.error(f"Error generating captions for batch of {len(images)}: {e}")
+            return [""] * len(images)
+
+    def _needs_embeddings(self, frames):
+        """
+        Нужны ли эмбеддинги для выбора кадров
+        
+        Без описаний кадров (BLIP выключен), без текста или когда кадров не
+        больше max_frames выбор идет без сравнения текстов.
+        """
+        return (len(frames) > self.max_frames and bool(self.text_segments)
+                and any(frame.get('caption') for frame in frames))
+
+    def _embed_frames(self, frames, cache_entry=None):
+        """
+        Эмбеддинги всех описаний кадров и сегментов транскрипции за один вызов
+        
+        Результат хранится в двух непрерывных матрицах: frame_embeddings и
+        segment_embeddings. Каждый кадр получает номер строки embedding_row.
+        """
+        captions = [frame.get('caption') or "" for frame in frames]
+        texts = captions + self.text_segments
+        if cache_entry is not None:
+            embeddings = cache_entry.embed(self._embedding_key(), texts, self._embed_texts)
+        else:
+            embeddings = self._embed_texts(texts)
+        
+        self.frame_embeddings = embeddings[:len(captions)]
+        self.segment_embeddings = embeddings[len(captions):]
+        for row, frame in enumerate(frames):
+            frame['embedding_row'] = row
+
+    def _embed_texts(self, texts):
+        """
+        Пакетное кодирование текстов SentenceTransformer
+        
+        Returns:
+            np.ndarray: Матрица (len(texts), dim) типа embeddings.dtype
+        """
+        dtype = np.dtype(self.embedding_config.get('dtype', 'float32'))
+        if not texts:
+            dim = self.embedding_model.get_sentence_embedding_dimension()
+            return np.empty((0, dim), dtype=dtype)
+            
+        embeddings = self.embedding_model.encode(
+            texts,
+            batch_size=int(self.embedding_config.get('batch_size', 64)),
+            convert_to_numpy=True,
+            show_progress_bar=False
+        )
+        return np.ascontiguousarray(embeddings, dtype=dtype)
+
     def cleanup(self):
         """Очистка ресурсов"""
         try:
-            if hasattr(self, 'caption_model'):
-                del self.caption_model
-            if hasattr(self, 'embedding_model'):
-                del self.embedding_model
+            # Модели общие и остаются в ModelRegistry, освобождаем только данные видео
+            self.frame_embeddings = None
+            self.segment_embeddings = None
             if torch.cuda.is_available():
                 torch.cuda.empty_cache()
         except Exception as e:
@@ -159,17 +626,96 @@ class FrameProcessor:
         self.cleanup()
 
     def _select_most_relevant_frames(self, frames):
-        """Выбор наиболее релевантных кадров"""
+        """
+        Выбор наиболее релевантных кадров
+        
+        Кадры и сегменты транскрипции сравниваются одной матрицей косинусной
+        близости. Затем кадры выбираются жадно: выигрыш кадра — насколько он
+        улучшает покрытие сегментов (facility location) за вычетом штрафа за
+        сходство с уже выбранными кадрами (MMR).
+        
+        Без описаний кадров, но с временными метками сегментов кадры
+        выбираются по количеству речи, которая к ним относится по времени.
+        """
         try:
-            # Если у нас нет текстовых сегментов, просто возвращаем кадры
-            if not hasattr(self, 'text_segments') or not self.text_segments:
-                # Возвращаем не более max_frames кадров
-                return frames[:self.max_frames]
+            if len(frames) <= self.max_frames:
+                return frames
+                
+            has_captions = any(frame.get('caption') for frame in frames)
+            has_timestamps = all(frame.get('timestamp') is not None for frame in frames)
+            if not has_captions and has_timestamps and self.transcript.has_times:
+                return self._select_by_speech_time(frames)
+                
+            if (not self.text_segments or not has_captions
+                    or self.frame_embeddings is None or not len(self.segment_embeddings)):
+                # Без текста выбираем кадры равномерно по времени
+                positions = np.linspace(0, len(frames) - 1, self.max_frames).round().astype(int)
+                return [frames[i] for i in np.unique(positions)]
+            
+            rows = np.fromiter((frame['embedding_row'] for frame in frames), dtype=np.int64)
+            frame_matrix = _normalize_rows(self.frame_embeddings[rows])
+            segment_matrix = _normalize_rows(self.segment_embeddings)
+            
+            similarity = frame_matrix @ segment_matrix.T
+            selected = select_by_coverage(
+                similarity,
+                frame_matrix,
+                self.max_frames,
+                diversity=self.config.get('selection_diversity', 0.3)
+            )
             
-            # Остальная логика выбора кадров...
-            # ...
+            # Сохраняем хронологический порядок кадров
+            return [frames[i] for i in sorted(selected)]
             
         except Exception as e:
             self.logger.error(f"Error selecting relevant frames: {e}")
             # В случае ошибки возвращаем исходные кадры
-            return frames[:self.max_frames]
\ No newline at end of file
+            return frames[:self.max_frames]
+
+    def _select_by_speech_time(self, frames):
+        """Выбор кадров сцен с наибольшей длительностью речи"""
+        frames = sorted(frames, key=lambda frame: frame['timestamp'])
+        times = np.fromiter((frame['timestamp'] for frame in frames), dtype=np.float64, count=len(frames))
+        speech = self.transcript.speech_per_moment(times)
+        
+        selected = np.argsort(-speech, kind='stable')[:self.max_frames]
+        return [frames[i] for i in sorted(selected)]
+
+def _normalize_rows(matrix):
+    """Нормализация строк матрицы к единичной длине (float32)"""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+def select_by_coverage(similarity, frame_matrix, k, diversity=0.3):
+    """
+    Жадный выбор k кадров по покрытию сегментов с учетом разнообразия
+    
+    Args:
+        similarity (np.ndarray): Близость кадров к сегментам, (n_frames, n_segments)
+        frame_matrix (np.ndarray): Нормализованные эмбеддинги кадров, (n_frames, dim)
+        k (int): Сколько кадров выбрать
+        diversity (float): Вес штрафа за сходство с уже выбранными кадрами
+        
+    Returns:
+        list: Индексы выбранных кадров в порядке выбора
+    """
+    n_frames, n_segments = similarity.shape
+    similarity = np.maximum(similarity, 0)
+    covered = np.zeros(n_segments, dtype=np.float32)
+    redundancy = np.zeros(n_frames, dtype=np.float32)
+    available = np.ones(n_frames, dtype=bool)
+    selected = []
+    
+    for _ in range(min(k, n_frames)):
+        gain = np.maximum(similarity - covered, 0).sum(axis=1) / n_segments
+        score = (1 - diversity) * gain - diversity * redundancy
+        score[~available] = -np.inf
+        
+        best = int(np.argmax(score))
+        selected.append(best)
+        available[best] = False
+        covered = np.maximum(covered, similarity[best])
+        redundancy = np.maximum(redundancy, frame_matrix @ frame_matrix[best])
+        
+    return selected
@@ -0,0 +1,203 @@
+import time
+import logging
+
+import numpy as np
+
+from .ffmpeg_decoder import FFmpegFrameReader, keyframe_times, probe_streams
+from .scene_detector import SceneDetector
+
+logger = logging.getLogger(__name__)
+
+class KeyframeScanner:
+    def __init__(self, detector, scan_fps=1.0, probe_seconds=2.0):
+        """
+        Быстрый поиск сцен по ключевым кадрам для длинных видео
+
+        Декодируются только I-кадры. Если смена сцены попала между двумя
+        ключевыми кадрами, этот отрезок декодируется с частотой scan_fps,
+        чтобы найти точное место смены.
+
+        Args:
+            detector (SceneDetector): Детектор сцен (кадры в RGB)
+            scan_fps (float): Частота кадров при уточнении отрезка
+            probe_seconds (float): Длина отрезка полного декодирования для
+                оценки выигрыша, если ни одна смена сцены не уточнялась
+        """
+        self.detector = detector
+        self.scan_fps = scan_fps
+        self.probe_seconds = probe_seconds
+        self.fps = None
+        self.stats = {}
+
+    @classmethod
+    def from_config(cls, config):
+        """Создание сканера из секции video_processing конфигурации"""
+        return cls(
+            SceneDetector.from_config(config, rgb=True),
+            scan_fps=config.get('scene_scan_fps', 1.0),
+            probe_seconds=config.get('keyframe_probe_seconds', 2.0)
+        )
+
+    def iter_scenes(self, video_path, max_resolution=None):
+        """
+        Выбор по одному кадру на сцену
+
+        Yields:
+            tuple: (индекс кадра, кадр RGB) представителя каждой сцены
+        """
+        started = time.perf_counter()
+        times = keyframe_times(video_path)
+        info = probe_streams(video_path)
+
+        reader = FFmpegFrameReader(
+            video_path,
+            max_resolution=max_resolution,
+            buffer_count=self.detector.batch_size + 2,
+            info=info
+        )
+        refiner = FFmpegFrameReader(video_path, max_resolution=max_resolution, info=info)
+        self.fps = reader.fps
+
+        self.stats = {
+            'keyframes': len(times),
+            'total_frames': reader.total_frames,
+            'refined_cuts': 0,
+            'refine_frames_decoded': 0,
+            'refine_seconds': 0.0,
+            'probe_frames_decoded': 0,
+            'probe_seconds': 0.0
+        }
+        self.detector.reset()
+        min_gap = max(1, int(round(self.detector.min_scene_length * reader.fps)))
+        current = None
+        batch = []
+
+        try:
+            for keyframe_time, (frame_idx, frame) in zip(times, reader.iter_keyframes(times)):
+                batch.append((keyframe_time, frame_idx, frame))
+                if len(batch) < self.detector.batch_size:
+                    continue
+                finished, current = self._consume(batch, current, min_gap, refiner)
+                yield from finished
+                batch = []
+
+            if batch:
+                finished, current = self._consume(batch, current, min_gap, refiner)
+                yield from finished
+
+            if current is not None:
+                yield current[1], current[2]
+        finally:
+            elapsed = time.perf_counter() - started
+            reader.close()
+            if not self.stats['refine_frames_decoded']:
+                self._probe_full_decode(refiner)
+            refiner.close()
+            self._report(elapsed, reader.fps)
+
+    def _consume(self, batch, current, min_gap, refiner):
+        """
+        Обработка пачки ключевых кадров
+
+        Returns:
+            tuple: (список завершенных сцен, последний ключевой кадр)
+        """
+        indices = np.fromiter((idx for _, idx, _ in batch), dtype=np.int64, count=len(batch))
+        cut_mask = self.detector.update(indices, [frame for _, _, frame in batch], min_gap)
+
+        finished = []
+        for keyframe, is_cut in zip(batch, cut_mask):
+            if is_cut and current is not None:
+                finished.append(self._refine(current, keyframe, refiner))
+            current = keyframe
+        return finished, current
+
+    def _refine(self, previous, keyframe, refiner):
+        """
+        Поиск последнего кадра сцены между двумя ключевыми кадрами
+
+        Returns:
+            tuple: (индекс кадра, кадр RGB) — последний кадр старой сцены
+        """
+        start_time, start_idx, start_frame = previous
+        end_time, _, end_frame = keyframe
+
+        # Между ключевыми кадрами нет промежуточных кадров для проверки
+        if (end_time - start_time) * self.scan_fps < 2:
+            return start_idx, start_frame
+
+        started = time.perf_counter()
+        inner = [
+            (frame_idx, frame.copy())
+            for frame_idx, frame in refiner.iter_range(start_time, end_time, self.scan_fps)
+        ]
+        self.stats['refined_cuts'] += 1
+        self.stats['refine_frames_decoded'] += int((end_time - start_time) * refiner.fps)
+        self.stats['refine_seconds'] += time.perf_counter() - started
+
+        if not inner:
+            return start_idx, start_frame
+
+        frames = [start_frame] + [frame for _, frame in inner] + [end_frame]
+        position = int(np.argmax(self.detector.pair_scores(frames)))
+        if position == 0:
+            return start_idx, start_frame
+        return inner[position - 1]
+
+    def _probe_full_decode(self, refiner):
+        """
+        Замер полного декодирования короткого отрезка в середине видео
+        
+        Нужен для оценки выигрыша, когда уточненных смен сцены нет. Время
+        замера не входит в elapsed_seconds.
+        """
+        duration = self.stats['total_frames'] / refiner.fps if refiner.fps else 0
+        length = min(self.probe_seconds, duration)
+        if length <= 0:
+            return
+        start_time = max((duration - length) / 2, 0)
+        try:
+            started = time.perf_counter()
+            for _ in refiner.iter_range(start_time, start_time + length, self.scan_fps):
+                pass
+            self.stats['probe_seconds'] = time.perf_counter() - started
+            self.stats['probe_frames_decoded'] = int(length * refiner.fps)
+        except Exception as e:
+            logger.warning(f"Full decode probe failed: {e}")
+
+    def _report(self, elapsed, fps):
+        """Расчет выигрыша по сравнению с полным декодированием"""
+        stats = self.stats
+        decoded = stats['keyframes'] + stats['refine_frames_decoded']
+        total = stats['total_frames']
+
+        stats['elapsed_seconds'] = round(elapsed, 2)
+        stats['frames_decoded'] = decoded
+        stats['decode_ratio'] = round(total / decoded, 1) if decoded else None
+
+        # Скорость полного декодирования оцениваем по уточняемым отрезкам,
+        # без них — по пробному отрезку, в крайнем случае по ключевым кадрам
+        if stats['refine_seconds'] > 0 and stats['refine_frames_decoded']:
+            rate = stats['refine_frames_decoded'] / stats['refine_seconds']
+            stats['speedup_basis'] = 'refine'
+        elif stats['probe_seconds'] > 0 and stats['probe_frames_decoded']:
+            rate = stats['probe_frames_decoded'] / stats['probe_seconds']
+            stats['speedup_basis'] = 'probe'
+        else:
+            rate = stats['keyframes'] / elapsed if elapsed > 0 else 0
+            stats['speedup_basis'] = 'keyframes'
+        if rate > 0:
+            estimated = total / rate
+            stats['estimated_full_decode_seconds'] = round(estimated, 2)
+            stats['speedup'] = round(estimated / elapsed, 1) if elapsed > 0 else None
+        else:
+            stats['estimated_full_decode_seconds'] = None
+            stats['speedup'] = None
+        stats['refine_seconds'] = round(stats['refine_seconds'], 2)
+        stats['probe_seconds'] = round(stats['probe_seconds'], 2)
+
+        logger.info(
+            f"Keyframe scan: decoded {decoded} of {total} frames "
+            f"({stats['decode_ratio']}x fewer), {stats['refined_cuts']} cuts refined, "
+            f"{stats['elapsed_seconds']}s, estimated speedup {stats['speedup']}x ({stats['speedup_basis']})"
+        )
@@ -0,0 +1,169 @@
+import os
+import time
+import logging
+import itertools
+import threading
+import subprocess
+import tempfile
+
+from .audio_extractor import SAMPLE_RATE, read_pcm
+from .ffmpeg_decoder import FFmpegFrameReader
+
+logger = logging.getLogger(__name__)
+
+class MediaReader(FFmpegFrameReader):
+    def __init__(self, video_path, audio_command, expected_samples=0,
+                 max_resolution=None, buffer_count=4, info=None):
+        """
+        Один проход ffmpeg по видео для аудио и кадров
+
+        Процесс ffmpeg с двумя выходами: моно 16kHz s16le в stdout и
+        уменьшенные кадры rgb24 в отдельный pipe. Файл читается с диска и
+        декодируется один раз. Аудио вычитывается фоновым потоком, кадры —
+        потоком, который итерирует iter_frames(), поэтому ни один из выходов
+        не блокирует ffmpeg.
+
+        Args:
+            video_path (str): Путь к видео файлу
+            audio_command (list): Команда ffmpeg с входом и выходом s16le в
+                pipe:1 (AudioExtractor.pcm_command)
+            expected_samples (int): Ожидаемое количество отсчетов аудио
+            max_resolution (int, optional): Максимальная высота кадра
+            buffer_count (int): Размер кольца буферов кадров
+            info (dict, optional): Готовый ответ probe_streams()
+        """
+        super().__init__(video_path, max_resolution=max_resolution,
+                         buffer_count=buffer_count, info=info)
+        self.audio_command = list(audio_command)
+        self.expected_samples = int(expected_samples)
+        self.started = False
+        self.stats = {}
+        self._video = None
+        self._audio_thread = None
+        self._samples = None
+        self._audio_error = None
+
+    def iter_frames(self, step=1, start_frame=0):
+        """
+        Запуск ffmpeg и выборка каждого step-го кадра
+
+        Аудио тем временем читается в фоновом потоке; после того как кадры
+        закончились, оно доступно через audio().
+
+        Yields:
+            tuple: (индекс кадра в исходном видео, кадр RGB из кольца буферов)
+        """
+        step = max(1, int(step))
+        self.close()
+        self.started = True
+        self._samples = None
+        self._audio_error = None
+
+        read_fd, write_fd = os.pipe()
+        command = self.audio_command + self._output_args(self._step_filters(step, start_frame))
+        command.append(f"pipe:{write_fd}")
+        logger.info(f"Running command: {' '.join(command)}")
+
+        self._stderr = tempfile.TemporaryFile()
+        try:
+            self._process = subprocess.Popen(
+                command,
+                stdout=subprocess.PIPE,
+                stderr=self._stderr,
+                pass_fds=(write_fd,)
+            )
+        except Exception:
+            os.close(read_fd)
+            raise
+        finally:
+            # Копия записывающего конца остается только у ffmpeg, иначе не будет EOF
+            os.close(write_fd)
+        self._video = os.fdopen(read_fd, 'rb', buffering=self.width * self.height * 3)
+
+        self._audio_thread = threading.Thread(
+            target=self._read_audio, args=(self._process.stdout,),
+            name='media-reader-audio', daemon=True
+        )
+        self._audio_thread.start()
+
+        started = time.perf_counter()
+        frames = 0
+        slot = 0
+        finished = False
+        try:
+            for frame_idx in itertools.count(start_frame, step):
+                buffer = self._buffers[slot]
+                if not self._read_into(memoryview(buffer).cast('B'), self._video):
+                    finished = True
+                    break
+                yield frame_idx, buffer
+                frames += 1
+                slot = (slot + 1) % self.buffer_count
+        finally:
+            # При досрочной остановке ffmpeg убивается, аудио остается неполным
+            self.close(wait=finished)
+            self.stats = {
+                'frames': frames,
+                'audio_seconds': round(len(self._samples) / SAMPLE_RATE, 1) if self._samples is not None else 0.0,
+                'seconds': round(time.perf_counter() - started, 2),
+                'complete': finished and self._audio_error is None
+            }
+
+    def audio(self):
+        """
+        Отсчеты аудио после прохода iter_frames()
+
+        Returns:
+            np.ndarray: Отсчеты float32 16kHz
+        """
+        if not self.started:
+            raise RuntimeError("Media reader was not started")
+        if self._audio_thread is not None:
+            self._audio_thread.join()
+        if self._audio_error:
+            raise RuntimeError(f"Single-pass audio failed: {self._audio_error}")
+        return self._samples
+
+    def _read_audio(self, stream):
+        """Чтение всего аудио выхода в фоновом потоке"""
+        try:
+            self._samples = read_pcm(stream, self.expected_samples)
+        except Exception as e:
+            self._audio_error = str(e)
+
+    def close(self, wait=False):
+        """
+        Остановка ffmpeg
+
+        Args:
+            wait (bool): Дождаться конца аудио вместо остановки процесса
+        """
+        process, self._process = self._process, None
+        if process is not None:
+            try:
+                if not wait and process.poll() is None:
+                    process.kill()
+                    self._audio_error = self._audio_error or "stopped before end of stream"
+                process.wait(timeout=None if wait else 10)
+            except Exception as e:
+                logger.warning(f"Error stopping ffmpeg media reader: {e}")
+
+        # Поток аудио заканчивается по EOF в stdout после выхода ffmpeg
+        if self._audio_thread is not None:
+            self._audio_thread.join()
+            self._audio_thread = None
+
+        if process is not None:
+            process.stdout.close()
+            if process.returncode not in (0, -9) and self._stderr is not None:
+                self._stderr.seek(0)
+                error = self._stderr.read().decode(errors='replace').strip()
+                logger.error(f"FFmpeg media reader failed: {error}")
+                self._audio_error = self._audio_error or error or f"exit code {process.returncode}"
+
+        if self._video is not None:
+            self._video.close()
+            self._video = None
+        if self._stderr is not None:
+            self._stderr.close()
+            self._stderr = None
@@ -0,0 +1,196 @@
+import gc
+import logging
+import threading
+from collections import OrderedDict
+
+import torch
+
+logger = logging.getLogger(__name__)
+
+# Общий для процесса реестр ML моделей
+class ModelRegistry:
+    _models = OrderedDict()
+    _sizes = {}
+    _budget_bytes = None
+    _lock = threading.RLock()
+
+    @classmethod
+    def configure(cls, budget_mb=None):
+        """
+        Установка лимита памяти для загруженных моделей
+
+        Args:
+            budget_mb (int, optional): Лимит в мегабайтах. None — без лимита.
+        """
+        with cls._lock:
+            cls._budget_bytes = int(budget_mb * 1024 * 1024) if budget_mb else None
+            cls._enforce_budget()
+
+    @classmethod
+    def get(cls, key, loader):
+        """
+        Получение модели из реестра или ленивая загрузка
+
+        Args:
+            key (str): Уникальный ключ модели (имя, устройство и т.д.)
+            loader (callable): Функция загрузки модели без аргументов
+
+        Returns:
+            object: Общий экземпляр модели
+        """
+        with cls._lock:
+            if key in cls._models:
+                cls._models.move_to_end(key)
+                return cls._models[key]
+
+            logger.info(f"Loading model: {key}")
+            rss_before = _process_rss()
+            model = loader()
+            size = _estimate_size(model) or max(_process_rss() - rss_before, 0)
+
+            cls._models[key] = model
+            cls._sizes[key] = size
+            logger.info(f"Model {key} loaded, approx. {size / 1024 / 1024:.0f}MB")
+
+            cls._enforce_budget(keep=key)
+            return model
+
+    @classmethod
+    def sentence_transformer(cls, name, device):
+        """Модель SentenceTransformer"""
+        def load():
+            from sentence_transformers import SentenceTransformer
+            return SentenceTransformer(name, device=device)
+        return cls.get(f"sentence_transformer:{name}:{device}", load)
+
+    @classmethod
+    def caption_pipeline(cls, model, device):
+        """Пайплайн image-to-text для описания кадров"""
+        def load():
+            from transformers import pipeline
+            return pipeline("image-to-text", model=model, device=device)
+        return cls.get(f"image_to_text:{model}:{device}", load)
+
+    @classmethod
+    def whisper(cls, name, device, compute_type='float32'):
+        """
+        Модель Whisper
+        
+        Args:
+            name (str): Размер модели (tiny, base, small, ...)
+            device (str): Устройство
+            compute_type (str): 'float32' или 'int8' — динамическое квантование
+                линейных слоев для инференса на CPU
+        """
+        if compute_type == 'int8' and device != 'cpu':
+            logger.warning(f"int8 Whisper is CPU only, using float32 on {device}")
+            compute_type = 'float32'
+            
+        def load():
+            import whisper
+            model = whisper.load_model(name, device=device)
+            if compute_type == 'int8':
+                model = _quantize_linear_int8(model)
+            return model
+        return cls.get(f"whisper:{name}:{device}:{compute_type}", load)
+
+    @classmethod
+    def evict(cls, key):
+        """Удаление модели из реестра"""
+        with cls._lock:
+            if cls._models.pop(key, None) is not None:
+                cls._sizes.pop(key, None)
+                logger.info(f"Evicted model: {key}")
+                cls._release_memory()
+
+    @classmethod
+    def evict_prefix(cls, prefix):
+        """Удаление всех моделей с ключом, начинающимся с prefix"""
+        with cls._lock:
+            for key in [key for key in cls._models if key.startswith(prefix)]:
+                cls.evict(key)
+
+    @classmethod
+    def clear(cls):
+        """Очистка реестра"""
+        with cls._lock:
+            cls._models.clear()
+            cls._sizes.clear()
+            cls._release_memory()
+
+    @classmethod
+    def memory_report(cls):
+        """Примерный размер загруженных моделей в мегабайтах (от старых к новым)"""
+        with cls._lock:
+            return {key: round(cls._sizes.get(key, 0) / 1024 / 1024, 1) for key in cls._models}
+
+    @classmethod
+    def _enforce_budget(cls, keep=None):
+        """Вытеснение давно не использованных моделей при превышении лимита"""
+        if not cls._budget_bytes:
+            return
+
+        evicted = False
+        while sum(cls._sizes.values()) > cls._budget_bytes:
+            victim = next((key for key in cls._models if key != keep), None)
+            if victim is None:
+                logger.warning(f"Model {keep} alone exceeds memory budget")
+                break
+            cls._models.pop(victim)
+            size = cls._sizes.pop(victim, 0)
+            logger.info(f"Evicted model {victim} ({size / 1024 / 1024:.0f}MB) to fit memory budget")
+            evicted = True
+
+        if evicted:
+            cls._release_memory()
+
+    @staticmethod
+    def _release_memory():
+        gc.collect()
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+def _quantize_linear_int8(model):
+    """Динамическое int8 квантование линейных слоев модели"""
+    # Whisper использует подкласс nn.Linear, который quantize_dynamic не узнает;
+    # его forward только приводит тип весов, поэтому достаточно базового класса
+    for module in model.modules():
+        if isinstance(module, torch.nn.Linear) and type(module) is not torch.nn.Linear:
+            module.__class__ = torch.nn.Linear
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+def _estimate_size(obj, seen=None):
+    """Оценка объема весов модели в байтах по тензорам параметров и буферов"""
+    if seen is None:
+        seen = set()
+
+    if isinstance(obj, torch.nn.Module):
+        total = 0
+        for tensor in list(obj.parameters()) + list(obj.buffers()):
+            pointer = tensor.data_ptr()
+            if pointer in seen:
+                continue
+            seen.add(pointer)
+            total += tensor.numel() * tensor.element_size()
+        # Веса квантованных слоев хранятся упакованными, а не в parameters()
+        for module in obj.modules():
+            if hasattr(module, '_packed_params') and callable(getattr(module, 'weight', None)):
+                weight = module.weight()
+                total += weight.numel() * weight.element_size()
+        return total
+    if isinstance(obj, dict):
+        return sum(_estimate_size(value, seen) for value in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sum(_estimate_size(value, seen) for value in obj)
+    # Пайплайны transformers хранят модель в атрибуте model
+    if hasattr(obj, 'model'):
+        return _estimate_size(obj.model, seen)
+    return 0
+
+def _process_rss():
+    """Текущий RSS процесса в байтах"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except Exception:
+        return 0
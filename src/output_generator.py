@@ -6,13 +6,15 @@ import subprocess
 from PIL import Image
 from pathlib import Path
 import os
-from sentence_transformers import SentenceTransformer
+import numpy as np
+
+from .model_registry import ModelRegistry
+from .transcript import TranscriptSegments
 
 class OutputGenerator:
     def __init__(self, output_dir):
         self.output_dir = Path(output_dir)
         self.logger = logging.getLogger(__name__)
-        self.text_model = SentenceTransformer('all-MiniLM-L6-v2')
         self.config = self._load_config()
         self._check_dependencies()
         self.output_dir.mkdir(exist_ok=True)
@@ -142,12 +144,7 @@ class OutputGenerator:
             return pdf_path
 
     def cleanup(self):
-        """Очистка ресурсов"""
-        try:
-            if hasattr(self, 'text_model'):
-                del self.text_model
-        except Exception as e:
-            self.logger.error(f"Error during cleanup: {e}")
+        """Очистка ресурсов (модели общие и остаются в ModelRegistry)"""
 
     def __del__(self):
         """Деструктор"""
@@ -158,37 +155,87 @@ class OutputGenerator:
         try:
             md_content = [f"# {video_title}\n\n"]
             
+            # С временными метками кадры ставятся рядом со своей речью
+            if isinstance(transcription, TranscriptSegments) and transcription.has_times:
+                relevant_frames, other_frames = self._find_relevant_frames(transcription, frames)
+                for text, segment_frames in zip(transcription.texts, relevant_frames):
+                    md_content.append(f"{text}\n\n")
+                    md_content.extend(self._frame_markdown(frame) for frame in segment_frames)
+                md_content.extend(self._frame_markdown(frame) for frame in other_frames)
+                return "\n".join(md_content)
+            
             # Группируем текст по темам
-            segments = self._group_by_topics(transcription)
+            segments = self._group_by_topics(str(transcription))
             
             for topic, text_segments in segments.items():
                 md_content.append(f"## {topic}\n\n")
                 
                 # Находим релевантные кадры для темы
-                relevant_frames = self._find_relevant_frames(text_segments, frames)
+                relevant_frames, other_frames = self._find_relevant_frames(text_segments, frames)
+                frames = other_frames
                 
                 # Добавляем текст и изображения
-                for text, frame in zip(text_segments, relevant_frames):
+                for text, segment_frames in zip(text_segments, relevant_frames):
                     md_content.append(f"{text}\n\n")
-                    if frame:
-                        md_content.append(
-                            f"![{frame['caption']}]({frame['path']})\n\n"
-                        )
-                        
+                    md_content.extend(self._frame_markdown(frame) for frame in segment_frames)
+                    
+            # Кадры, не попавшие ни в одну тему
+            md_content.extend(self._frame_markdown(frame) for frame in frames)
             return "\n".join(md_content)
             
         except Exception as e:
             self.logger.error(f"Error generating markdown: {e}")
             raise
 
+    def _frame_markdown(self, frame):
+        return f"![{frame.get('caption') or ''}]({frame['path']})\n\n"
+
+    def _find_relevant_frames(self, text_segments, frames):
+        """
+        Кадры для каждого сегмента текста по времени
+        
+        Сегменты сопоставляются кадрам слиянием по времени, кадр ставится
+        после последнего относящегося к нему сегмента. Кадр, которому не
+        досталось ни одного сегмента (несколько кадров внутри одной
+        реплики), ставится после ближайшего сегмента, начавшегося не позже
+        него. Ни один выбранный кадр не теряется.
+        
+        Returns:
+            tuple: (список кадров для каждого сегмента, кадры без
+                временной метки или без сегментов для размещения)
+        """
+        relevant = [[] for _ in text_segments]
+        timed = sorted(
+            (frame for frame in frames if frame.get('timestamp') is not None),
+            key=lambda frame: frame['timestamp']
+        )
+        untimed = [frame for frame in frames if frame.get('timestamp') is None]
+        if not timed or not isinstance(text_segments, TranscriptSegments) or not text_segments.has_times:
+            return relevant, timed + untimed
+            
+        times = np.array([frame['timestamp'] for frame in timed], dtype=np.float64)
+        owners = text_segments.assign(times)
+        placement = np.full(len(timed), -1, dtype=np.int64)
+        for segment_idx, frame_pos in enumerate(owners):
+            placement[frame_pos] = segment_idx
+            
+        unowned = placement < 0
+        if unowned.any():
+            preceding = np.searchsorted(text_segments.starts, times[unowned], side='right') - 1
+            placement[unowned] = np.maximum(preceding, 0)
+            
+        for frame_pos in np.argsort(placement, kind='stable'):
+            relevant[placement[frame_pos]].append(timed[frame_pos])
+        return relevant, untimed
+
     def _group_by_topics(self, transcription):
         """Группировка текста по темам используя NLP"""
         try:
             from transformers import pipeline
             
-            classifier = pipeline(
-                "zero-shot-classification",
-                model="facebook/bart-large-mnli"
+            classifier = ModelRegistry.get(
+                "zero_shot:facebook/bart-large-mnli",
+                lambda: pipeline("zero-shot-classification", model="facebook/bart-large-mnli")
             )
             
             # Определяем темы
@@ -9,7 +9,6 @@ import torch
 import subprocess
 import urllib.parse
 import yt_dlp
-import gc
 import resource
 import shutil
 from pathlib import Path
@@ -19,34 +18,39 @@ from whisper import load_model
 import logging.config
 
 # Импортируем наши модули
-from .audio_extractor import AudioExtractor
+from .audio_extractor import AudioExtractor, SAMPLE_RATE
 from .frame_processor import FrameProcessor
 from .output_generator import OutputGenerator
 from .youtube_api import YouTubeAPI
+from .model_registry import ModelRegistry
+from .voice_activity import VoiceActivityDetector
+from .chunked_transcriber import ChunkedTranscriber
+from .transcript import TranscriptSegments
+from .transcript_cache import TranscriptCache
+from .frame_cache import file_fingerprint
+from .ffmpeg_decoder import probe_streams
+from .media_reader import MediaReader
+from .streaming import DownloadTracker, StageTimer, follow_file, decode_pcm_stream
+from .subtitles import parse_subtitles
 
 # Настройка логирования
 logger = logging.getLogger(__name__)
 
-# Кэш для моделей Whisper
+# Кэш для моделей Whisper поверх общего ModelRegistry
 class WhisperModelCache:
-    _models = {}
-    
     @classmethod
-    def get_model(cls, model_name, device):
-        """Получение модели Whisper из кэша или загрузка новой"""
-        key = f"{model_name}_{device}"
-        if key not in cls._models:
-            logger.info(f"Loading Whisper model: {model_name} on {device}")
-            cls._models[key] = whisper.load_model(model_name, device=device)
-        return cls._models[key]
+    def get_model(cls, model_name, device, compute_type='float32'):
+        """
+        Получение модели Whisper из кэша или загрузка новой
+        
+        Модели с разным compute_type ('float32', 'int8') кэшируются отдельно.
+        """
+        return ModelRegistry.whisper(model_name, device, compute_type)
     
     @classmethod
     def clear_cache(cls):
         """Очистка кэша моделей"""
-        cls._models.clear()
-        gc.collect()
-        if torch.cuda.is_available():
-            torch.cuda.empty_cache()
+        ModelRegistry.evict_prefix("whisper:")
 
 # Основной класс для обработки видео
 class VideoProcessor:
@@ -65,6 +69,9 @@ class VideoProcessor:
         else:
             self.config = config
             
+        # Лимит памяти для общих ML моделей
+        ModelRegistry.configure(self.config.get('memory', {}).get('model_budget_mb'))
+            
         # Инициализируем пути
         self.temp_dir = self.config.get('temp_dir', '/tmp/video_processor')
         self.output_dir = self.config.get('output_dir', '/tmp/video_output')
@@ -76,8 +83,31 @@ class VideoProcessor:
         # Инициализируем компоненты
         self.youtube_api = YouTubeAPI()
         self.audio_extractor = AudioExtractor(self.temp_dir)
-        self.frame_processor = FrameProcessor(self.output_dir)
+        video_config = self.config.get('video_processing', {})
+        self.frame_processor = FrameProcessor(
+            self.output_dir,
+            max_frames=video_config.get('max_frames', 10),
+            mode=video_config.get('frame_mode', 'scenes'),
+            blip_enabled=self.config.get('blip', {}).get('enabled', True)
+        )
         self.output_generator = OutputGenerator(self.output_dir)
+        self.audio_stats = {}
+        self.transcriber = None
+        self.transcript_cache = None
+        self.last_captions = None
+        # Язык речи текущей задачи (None — автоопределение Whisper)
+        self.language = self.config.get('transcription', {}).get('language')
+        # Кадры-кандидаты из общего с аудио прохода ffmpeg для текущей задачи
+        self.frame_candidates = None
+        # Отдельный файл аудио при раздельной загрузке потоков
+        self.audio_source = None
+        # Отрезки видео, если видео загружено не целиком
+        self.video_clips = None
+        self.download_stats = {}
+        # Транскрипция, полученная во время загрузки (или из кэша), и ее ключ кэша
+        self.ready_transcription = None
+        self.ready_cache_key = None
+        self.stages = StageTimer()
         
         # Проверяем зависимости
         self._check_dependencies()
@@ -114,6 +144,50 @@ class VideoProcessor:
                 }
             }
             
+    @classmethod
+    def load_models(cls, config):
+        """
+        Загрузка в ModelRegistry моделей, которые нужны каждой задаче
+        
+        Ключи совпадают с теми, что запрашивают компоненты процессора, поэтому
+        задачи получают уже загруженные экземпляры. Не требует создания
+        процессора, поэтому подходит для главного процесса воркера до fork.
+        
+        Returns:
+            dict: Примерный размер загруженных моделей в мегабайтах
+        """
+        transcription_config = config.get('transcription', {})
+        use_gpu = transcription_config.get('use_gpu', False)
+        WhisperModelCache.get_model(
+            transcription_config.get('model', 'small'),
+            "cuda" if use_gpu and torch.cuda.is_available() else "cpu",
+            config.get('whisper', {}).get('compute_type', 'float32')
+        )
+        
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+        blip_config = config.get('blip', {})
+        if blip_config.get('enabled', True):
+            ModelRegistry.caption_pipeline(
+                blip_config.get('model', 'Salesforce/blip-image-captioning-base'), device
+            )
+            # Эмбеддинги нужны только для сравнения описаний кадров с текстом
+            ModelRegistry.sentence_transformer(
+                config.get('embeddings', {}).get('model', 'all-MiniLM-L6-v2'), device
+            )
+        return ModelRegistry.memory_report()
+        
+    def preload_models(self):
+        """
+        Загрузка моделей, которые нужны каждой задаче
+        
+        Используется воркером, чтобы первая задача не платила за загрузку.
+        Модели, уже загруженные в главном процессе до fork, не загружаются заново.
+        """
+        try:
+            self.logger.info(f"Models preloaded: {self.load_models(self.config)}")
+        except Exception as e:
+            self.logger.warning(f"Model preloading failed, models will load on demand: {e}")
+            
     def _check_dependencies(self):
         """Проверка наличия необходимых зависимостей"""
         try:
@@ -142,16 +216,30 @@ class VideoProcessor:
         except Exception as e:
             self.logger.error(f"Error checking dependencies: {e}")
             
-    def process_video(self, url):
+    def process_video(self, url, options=None):
         """
         Обработка видео
         
         Args:
             url (str): URL видео или путь к локальному файлу
+            options (dict, optional): Параметры задачи, например
+                frame_mode ('interval', 'scenes', 'keyframes'),
+                language (язык субтитров и распознавания),
+                captions_file (локальный файл субтитров .vtt/.srv3 вместо Whisper)
             
         Returns:
             dict: Результат обработки
         """
+        options = options or {}
+        self.language = options.get('language') or self.config.get('transcription', {}).get('language')
+        self.audio_stats = {}
+        self.frame_candidates = None
+        self.audio_source = None
+        self.video_clips = None
+        self.download_stats = {}
+        self.ready_transcription = None
+        self.ready_cache_key = None
+        self.stages = StageTimer()
         try:
             # Создаем временную директорию для файлов
             temp_dir = os.path.join(self.temp_dir, str(uuid.uuid4()))
@@ -160,6 +248,9 @@ class VideoProcessor:
             # Определяем, является ли url локальным файлом
             is_local_file = os.path.exists(url)
             
+            video_id = None
+            captions = None
+            caption_languages = self._caption_languages()
             if is_local_file:
                 video_path = url
                 video_title = os.path.basename(url).split('.')[0]
@@ -181,7 +272,8 @@ class VideoProcessor:
                 self.logger.info(f"Processing video: {video_title}")
                 
                 # Загружаем видео
-                video_path = self._download_video(url)
+                video_path = self._download_video(url, caption_languages, video_id)
+                captions = self.last_captions
                 if not video_path:
                     # Если не удалось загрузить, создаем пустое видео
                     self.logger.warning("Failed to download video, creating empty video")
@@ -189,24 +281,23 @@ class VideoProcessor:
                     if not video_path:
                         raise ValueError("Failed to create empty video")
             
-            # Извлекаем аудио
-            audio_path = self._extract_audio(video_path)
-            
-            # Если не удалось извлечь аудио, создаем пустой файл
-            if not audio_path:
-                self.logger.warning("Failed to extract audio, creating empty audio file")
-                audio_path = self.audio_extractor._create_empty_audio()
-                transcription = "Не удалось извлечь аудио из видео."
+            # Локальный файл субтитров имеет приоритет над загруженными
+            captions = self._captions_file(options, caption_languages) or captions
+                
+            # Субтитры, транскрипция из кэша или распознавание речи
+            if self.ready_transcription is not None and not options.get('captions_file'):
+                transcription = self.ready_transcription
             else:
-                # Транскрибируем аудио
-                transcription = self._transcribe_audio(audio_path)
+                with self.stages.stage('transcription'):
+                    transcription = self._get_transcription(video_path, video_id, captions, options.get('frame_mode'))
                 
             # Если не удалось транскрибировать, используем заглушку
             if not transcription:
-                transcription = "Не удалось распознать речь в видео."
+                transcription = TranscriptSegments.from_text("Не удалось распознать речь в видео.")
                 
             # Извлекаем кадры
-            frames = self._extract_frames(video_path)
+            with self.stages.stage('frames'):
+                frames = self._extract_frames(video_path, transcription, options.get('frame_mode'))
             
             # Если не удалось извлечь кадры, используем заглушку
             if not frames or len(frames) == 0:
@@ -214,7 +305,8 @@ class VideoProcessor:
                 frames = []
                 
             # Генерируем выходной файл
-            output_path = self._generate_pdf(transcription, frames, video_title)
+            with self.stages.stage('render'):
+                output_path = self._generate_pdf(transcription, frames, video_title)
             
             # Очищаем временные файлы
             self._cleanup_temp_files(temp_dir)
@@ -222,7 +314,11 @@ class VideoProcessor:
             return {
                 'status': 'completed',
                 'output_path': str(output_path),
-                'video_title': video_title
+                'video_title': video_title,
+                'frame_stats': self.frame_processor.last_stats,
+                'audio_stats': self.audio_stats,
+                'download_stats': self.download_stats,
+                'pipeline_stats': self.stages.report()
             }
             
         except Exception as e:
@@ -275,8 +371,30 @@ class VideoProcessor:
             self.logger.error(f"Error extracting video ID: {e}")
             return None
             
-    def _download_video(self, url):
-        """Загрузка видео с YouTube с ограничением качества"""
+    def _caption_languages(self):
+        """Языки субтитров по убыванию приоритета (пусто — субтитры не нужны)"""
+        captions_config = self.config.get('captions', {})
+        if not captions_config.get('enabled', True):
+            return []
+        if self.language:
+            return [self.language]
+        return list(captions_config.get('languages', ['ru', 'en']))
+            
+    def _download_video(self, url, caption_languages=None, video_id=None):
+        """
+        Загрузка видео с YouTube с ограничением качества
+        
+        При download.split_streams аудио и видео без звука (не выше
+        video_processing.max_resolution) загружаются отдельными потоками
+        параллельно; путь к аудио сохраняется в self.audio_source. Иначе
+        загружается один файл со звуком.
+        
+        Если переданы caption_languages, тем же запросом yt-dlp загружается
+        дорожка субтитров; она сохраняется в self.last_captions.
+        """
+        self.last_captions = None
+        self.audio_source = None
+        self.video_clips = None
         try:
             self.logger.info(f"Downloading video from URL: {url}")
             
@@ -284,6 +402,12 @@ class VideoProcessor:
             temp_dir = os.path.join(self.temp_dir, str(uuid.uuid4()))
             os.makedirs(temp_dir, exist_ok=True)
             
+            download_config = self.config.get('download', {})
+            if download_config.get('split_streams', True):
+                video_path = self._download_split(url, temp_dir, caption_languages, video_id)
+                if video_path:
+                    return video_path
+            
             # Настройки для yt-dlp с сильным ограничением качества для экономии ресурсов
             ydl_opts = {
                 'format': 'worst[height<=360]',  # Используем самое низкое качество
@@ -293,10 +417,15 @@ class VideoProcessor:
                 'no_warnings': True,
                 'ignoreerrors': True,
             }
+            if caption_languages:
+                ydl_opts.update(self.youtube_api.subtitle_options(
+                    caption_languages,
+                    automatic=self.config.get('captions', {}).get('automatic', True)
+                ))
             
             # Загружаем видео
             try:
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                with self.stages.stage('download'), yt_dlp.YoutubeDL(ydl_opts) as ydl:
                     info = ydl.extract_info(url, download=True)
                     if not info:
                         self.logger.warning(f"Could not extract video info from URL: {url}")
@@ -310,6 +439,8 @@ class VideoProcessor:
                         return None
                     
                     self.logger.info(f"Video downloaded successfully: {video_path}")
+                    if caption_languages:
+                        self.last_captions = self.youtube_api.captions_from_info(info, caption_languages)
                     return video_path
             except Exception as e:
                 self.logger.error(f"Error downloading video with yt-dlp: {e}")
@@ -319,6 +450,126 @@ class VideoProcessor:
             self.logger.error(f"Error downloading video: {e}")
             return None
             
+    def _download_split(self, url, temp_dir, caption_languages=None, video_id=None):
+        """
+        Раздельная загрузка аудио и видео; None, если она невозможна
+        
+        Оба потока загружаются параллельно. Если нужна транскрипция Whisper
+        (нет субтитров и записи в кэше) и включен download.streaming, аудио
+        декодируется и распознается по мере загрузки, пока видео еще
+        загружается.
+        """
+        download_config = self.config.get('download', {})
+        ranges_enabled = download_config.get('video_ranges', False)
+        automatic_captions = self.config.get('captions', {}).get('automatic', True)
+        try:
+            plan = self.youtube_api.plan_split_download(
+                url,
+                max_height=self.config.get('video_processing', {}).get('max_resolution') or 480,
+                min_audio_bitrate=download_config.get('min_audio_bitrate', 48),
+                range_count=download_config.get('range_count', 30) if ranges_enabled else 0,
+                range_window=download_config.get('range_window', 8),
+                range_min_duration=download_config.get('range_min_duration', 600)
+            )
+        except Exception as e:
+            self.logger.warning(f"Split download planning failed, downloading a single file: {e}")
+            return None
+        if plan is None:
+            return None
+            
+        tracker = None
+        if download_config.get('streaming', True) and self._needs_whisper(plan['info'], video_id, caption_languages):
+            tracker = DownloadTracker()
+            
+        def transcribe_while_downloading():
+            try:
+                with self.stages.stage('transcription'):
+                    return self._transcribe_stream(tracker)
+            except Exception as e:
+                self.logger.warning(f"Streaming transcription failed, transcribing after download: {e}")
+                return None
+                
+        try:
+            # Субтитров нет, если нужна потоковая транскрипция
+            download = self.youtube_api.download_split(
+                url, temp_dir,
+                concurrent_fragments=download_config.get('concurrent_fragments', 4),
+                caption_languages=None if tracker else caption_languages,
+                automatic_captions=automatic_captions,
+                plan=plan,
+                audio_tracker=tracker,
+                while_downloading=transcribe_while_downloading if tracker else None,
+                stages=self.stages
+            )
+        except Exception as e:
+            self.logger.warning(f"Split download failed, downloading a single file: {e}")
+            self.ready_transcription = None
+            return None
+            
+        self.audio_source = download['audio']
+        self.video_clips = download['video_sections']
+        if caption_languages and tracker is None:
+            self.last_captions = download['captions']
+        self.download_stats = download['stats']
+        
+        # В кэш попадает только новая непустая транскрипция, а не загруженная из него
+        streamed = download['result']
+        if streamed is not None:
+            self.ready_transcription = streamed
+            if streamed and self.ready_cache_key is not None:
+                self._store_transcript(self.ready_cache_key, streamed)
+        return download['video']
+        
+    def _needs_whisper(self, info, video_id=None, caption_languages=None):
+        """
+        Нужно ли распознавание речи для видео
+        
+        Не нужно, если у видео есть субтитры на нужном языке или транскрипция
+        уже есть в кэше (она сохраняется в self.ready_transcription).
+        """
+        automatic = self.config.get('captions', {}).get('automatic', True)
+        if caption_languages and self.youtube_api.has_captions(info, caption_languages, automatic):
+            return False
+        if video_id:
+            cache_key, cached = self._lookup_transcript(None, video_id)
+            self.ready_cache_key = cache_key
+            if cached is not None:
+                self.ready_transcription = cached
+                return False
+        return True
+        
+    def _transcribe_stream(self, tracker):
+        """
+        Распознавание аудио по мере загрузки
+        
+        Растущий файл загрузки подается в stdin ffmpeg, отсчеты из stdout
+        идут в ChunkedTranscriber.transcribe_stream окнами.
+        
+        Returns:
+            TranscriptSegments: Сегменты с временными метками
+        """
+        transcription_config = self.config.get('transcription', {})
+        # Параметры потока неизвестны до декодирования: ffmpeg сам сведет в моно 16kHz
+        plan = {'stream': 0, 'channels': None, 'sample_rate': None, 'corrupt': False}
+        command = self.audio_extractor.pcm_command('pipe:0', plan)
+        blocks = decode_pcm_stream(follow_file(tracker), command)
+        
+        vad = None
+        if transcription_config.get('vad_enabled', True):
+            vad = VoiceActivityDetector.from_config(transcription_config)
+            
+        self.logger.info("Transcribing audio while it downloads")
+        transcriber = self._get_transcriber()
+        result = transcriber.transcribe_stream(
+            blocks, vad, window_duration=transcription_config.get('stream_window', 120),
+            language=self.language
+        )
+        self.audio_stats['chunks'] = transcriber.stats
+        self.audio_stats['streaming'] = True
+        if vad is not None:
+            self.audio_stats['vad'] = vad.stats
+        return TranscriptSegments.from_whisper(result)
+            
     def _create_empty_video(self, temp_dir):
         """Создание пустого видео файла для продолжения обработки"""
         try:
@@ -348,44 +599,254 @@ class VideoProcessor:
             self.logger.error(f"Failed to create empty video: {e}")
             return None
             
-    def _extract_audio(self, video_path):
-        """Извлечение аудио из видео"""
+    def _captions_file(self, options, caption_languages=None):
+        """
+        Дорожка субтитров из options['captions_file'] (без сети)
+        
+        Returns:
+            dict: {'path', 'language', 'automatic'} или None
+        """
+        path = options.get('captions_file')
+        if not path:
+            return None
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Captions file not found: {path}")
+        return {
+            'path': path,
+            'language': caption_languages[0] if caption_languages else None,
+            'automatic': False
+        }
+        
+    def _get_transcription(self, video_path, video_id=None, captions=None, frame_mode=None):
+        """
+        Транскрипция видео с использованием субтитров и кэша
+        
+        Если есть дорожка субтитров на нужном языке, Whisper не запускается.
+        При попадании в кэш аудио не извлекается вовсе. Ключ кэша — ID видео
+        YouTube или хэш содержимого файла вместе с моделью, языком и
+        compute_type.
+        
+        Args:
+            captions (dict, optional): {'path', 'language', 'automatic'}
+            frame_mode (str, optional): Режим кадров для общего прохода ffmpeg
+        
+        Returns:
+            TranscriptSegments: Сегменты или None, если речь не распознана
+        """
+        if captions:
+            try:
+                segments = parse_subtitles(captions['path'])
+                if len(segments):
+                    self.logger.info(f"Using {captions['language']} captions instead of Whisper")
+                    self.audio_stats['captions'] = {
+                        'language': captions['language'],
+                        'automatic': captions['automatic'],
+                        'segments': len(segments)
+                    }
+                    return segments
+            except Exception as e:
+                self.logger.warning(f"Could not use captions {captions['path']}: {e}")
+                
+        cache_key, cached = self._lookup_transcript(video_path, video_id)
+        if cached is not None:
+            return cached
+        
+        # Извлекаем аудио (путь к WAV или массив отсчетов 16kHz)
+        audio = self._extract_audio(video_path, frame_mode)
+        
+        # Видео без звука сразу идет по пути без речи
+        audio_plan = self.audio_extractor.last_plan
+        if audio_plan is not None and not audio_plan['has_audio']:
+            self.logger.info("Video has no audio stream, skipping transcription")
+            return TranscriptSegments.from_text("В видео нет звуковой дорожки.")
+        if audio is None or len(audio) == 0:
+            self.logger.warning("Failed to extract audio")
+            return TranscriptSegments.from_text("Не удалось извлечь аудио из видео.")
+            
+        # Транскрибируем аудио
+        transcription = self._transcribe_audio(audio)
+        if transcription and cache_key is not None:
+            self._store_transcript(cache_key, transcription)
+        return transcription
+        
+    def _lookup_transcript(self, video_path, video_id=None):
+        """
+        Транскрипция из кэша по ID видео или хэшу файла
+        
+        Язык задачи входит в ключ: одно видео с разными языками кэшируется
+        отдельно.
+        
+        Returns:
+            tuple: (ключ кэша или None, если кэш недоступен; сегменты или None)
+        """
+        if not self.config.get('transcript_cache', {}).get('enabled', True):
+            return None, None
         try:
+            if self.transcript_cache is None:
+                self.transcript_cache = TranscriptCache.from_config(self.config)
+                
+            transcription_config = self.config.get('transcription', {})
+            cache_key = self.transcript_cache.key(
+                video_id or file_fingerprint(video_path),
+                transcription_config.get('model', 'small'),
+                self.language,
+                self.config.get('whisper', {}).get('compute_type', 'float32')
+            )
+            cached = self.transcript_cache.get(cache_key)
+            self.audio_stats['transcript_cache'] = self.transcript_cache.stats()
+            if cached is not None:
+                self.audio_stats['transcript_cache']['hit'] = True
+            return cache_key, cached
+        except Exception as e:
+            self.logger.warning(f"Transcript cache unavailable: {e}")
+            return None, None
+            
+    def _store_transcript(self, cache_key, transcription):
+        """Сохранение транскрипции в кэш"""
+        try:
+            self.transcript_cache.put(cache_key, transcription)
+        except Exception as e:
+            self.logger.warning(f"Could not cache transcript: {e}")
+            
+    def _extract_audio(self, video_path, frame_mode=None):
+        """
+        Извлечение аудио из видео
+        
+        При transcription.streaming_audio аудио читается из ffmpeg прямо в
+        память, иначе записывается WAV файл. При video_processing.single_pass
+        тот же процесс ffmpeg отдает и кадры-кандидаты. При раздельной загрузке
+        аудио читается из self.audio_source. Для видео без звука возвращает None.
+        """
+        self.audio_extractor.last_plan = None
+        if self.audio_source:
+            # Звук загружен отдельным файлом, видео для него читать не нужно
+            video_path = self.audio_source
+        try:
+            if self.config.get('transcription', {}).get('streaming_audio', True):
+                if self.audio_source is None and self._single_pass_enabled(frame_mode):
+                    try:
+                        return self._demux_media(video_path, frame_mode)
+                    except Exception as e:
+                        self.logger.warning(f"Single-pass demux failed, reading audio separately: {e}")
+                        
+                self.logger.info(f"Streaming audio from video: {video_path}")
+                return self.audio_extractor.extract_pcm(video_path)
+                
             self.logger.info(f"Extracting audio from video: {video_path}")
             return self.audio_extractor.extract(video_path)
         except Exception as e:
             self.logger.error(f"Error extracting audio: {e}")
             return None
             
-    def _transcribe_audio(self, audio_path):
-        """Транскрибация аудио"""
+    def _single_pass_enabled(self, frame_mode=None):
+        """Общий проход ffmpeg возможен для режимов с выборкой кадров по частоте"""
+        if not self.config.get('video_processing', {}).get('single_pass', True):
+            return False
+        return (frame_mode or self.frame_processor.mode) in ('interval', 'scenes')
+        
+    def _demux_media(self, video_path, frame_mode=None):
+        """
+        Аудио и кадры-кандидаты за одно чтение файла
+        
+        Один процесс ffmpeg пишет аудио в stdout и кадры в отдельный pipe.
+        Кадры обрабатывает FrameProcessor в этом потоке, аудио параллельно
+        вычитывается потоком MediaReader. Кандидаты сохраняются в
+        self.frame_candidates и потом выбираются по готовой транскрипции.
+        
+        Returns:
+            np.ndarray: Отсчеты float32 16kHz или None, если звука нет
+        """
+        info = probe_streams(video_path)
+        plan = self.audio_extractor.plan(video_path, info)
+        if not plan['has_audio'] or plan['corrupt']:
+            # Без звука кадры читаются обычным путем; поврежденные файлы — отдельными проходами
+            return self.audio_extractor.extract_pcm(video_path) if plan['has_audio'] else None
+            
+        reader = MediaReader(
+            video_path,
+            self.audio_extractor.pcm_command(video_path, plan),
+            expected_samples=int(plan['duration'] * SAMPLE_RATE),
+            max_resolution=self.config.get('video_processing', {}).get('max_resolution'),
+            buffer_count=self.frame_processor.frame_buffer_count(),
+            info=info
+        )
+        self.logger.info(f"Reading audio and frames in one pass: {video_path}")
         try:
-            self.logger.info(f"Transcribing audio: {audio_path}")
+            self.frame_candidates = self.frame_processor.collect_candidates(
+                video_path, frame_mode, media_reader=reader, clips=self.video_clips
+            )
+        finally:
+            reader.close()
+            
+        if not reader.started:
+            # Кандидаты взяты из кэша кадров, видео декодировать не нужно
+            return self.audio_extractor.extract_pcm(video_path)
+            
+        samples = reader.audio()
+        self.audio_stats['single_pass'] = reader.stats
+        self.logger.info(
+            f"Single pass over {video_path}: {reader.stats['frames']} frames, "
+            f"{reader.stats['audio_seconds']}s of audio in {reader.stats['seconds']}s"
+        )
+        return samples
+        
+    def _transcribe_audio(self, audio):
+        """
+        Транскрибация аудио
+        
+        Запись режется на участки речи (VAD) и куски около
+        transcription.chunk_duration, которые распознаются параллельно.
+        
+        Args:
+            audio (str или np.ndarray): Путь к аудио файлу или отсчеты float32 16kHz
             
-            model_name = self.config.get('transcription', {}).get('model', 'small')
-            use_gpu = self.config.get('transcription', {}).get('use_gpu', False)
-            device = "cuda" if use_gpu and torch.cuda.is_available() else "cpu"
+        Returns:
+            TranscriptSegments: Сегменты с временными метками или None
+        """
+        try:
+            if isinstance(audio, str):
+                self.logger.info(f"Transcribing audio: {audio}")
+                audio = whisper.load_audio(audio)
+            else:
+                self.logger.info(f"Transcribing {len(audio) / SAMPLE_RATE:.1f}s of in-memory audio")
             
-            model = WhisperModelCache.get_model(model_name, device)
-            result = model.transcribe(audio_path)
+            transcription_config = self.config.get('transcription', {})
             
-            # Извлекаем текст из результата
-            if isinstance(result, dict) and 'text' in result:
-                return result['text']
-            elif isinstance(result, dict) and 'segments' in result:
-                return ' '.join([segment.get('text', '') for segment in result['segments']])
-            else:
-                return str(result)
+            spans = None
+            if transcription_config.get('vad_enabled', True):
+                vad = VoiceActivityDetector.from_config(transcription_config)
+                spans = vad.detect(audio)
+                self.audio_stats['vad'] = vad.stats
+            
+            transcriber = self._get_transcriber()
+            result = transcriber.transcribe(audio, spans, language=self.language)
+            self.audio_stats['chunks'] = transcriber.stats
+            
+            # Сегменты с временными метками исходной записи
+            return TranscriptSegments.from_whisper(result)
                 
         except Exception as e:
             self.logger.error(f"Error transcribing audio: {e}")
             return None
             
-    def _extract_frames(self, video_path):
+    def _get_transcriber(self):
+        """Транскрайбер с пулом процессов, общий для задач этого процессора"""
+        if self.transcriber is None:
+            use_gpu = self.config.get('transcription', {}).get('use_gpu', False)
+            device = "cuda" if use_gpu and torch.cuda.is_available() else "cpu"
+            self.transcriber = ChunkedTranscriber.from_config(
+                self.config, device=device, temp_dir=self.temp_dir
+            )
+        return self.transcriber
+            
+    def _extract_frames(self, video_path, transcription=None, frame_mode=None):
         """Извлечение и обработка кадров"""
         try:
             self.logger.info(f"Extracting frames from video: {video_path}")
-            return self.frame_processor.process(video_path)
+            return self.frame_processor.process(
+                video_path, transcription, mode=frame_mode,
+                candidates=self.frame_candidates, clips=self.video_clips
+            )
         except Exception as e:
             self.logger.error(f"Error extracting frames: {e}")
             return []
@@ -0,0 +1,230 @@
+import logging
+from collections import deque
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class SceneDetector:
+    def __init__(self, scan_width=160, batch_size=64, hist_bins=(16, 4, 4),
+                 min_threshold=0.15, sensitivity=3.0, window=300,
+                 min_scene_length=2.0, hist_weight=0.6, rgb=False):
+        """
+        Детектор смены сцен по уменьшенным кадрам
+
+        Args:
+            scan_width (int): Ширина кадра для анализа (высота по пропорции)
+            batch_size (int): Количество кадров в пачке для update()
+            hist_bins (tuple): Количество корзин гистограммы по H, S, V
+            min_threshold (float): Нижняя граница адаптивного порога
+            sensitivity (float): Множитель MAD в адаптивном пороге
+            window (int): Сколько последних оценок учитывает порог
+            min_scene_length (float): Минимальная длина сцены в секундах
+            hist_weight (float): Вес разницы гистограмм в итоговой оценке
+            rgb (bool): Кадры в порядке RGB, а не BGR
+        """
+        self.scan_width = scan_width
+        self.batch_size = batch_size
+        self.hist_bins = tuple(hist_bins)
+        self.min_threshold = min_threshold
+        self.sensitivity = sensitivity
+        self.window = window
+        self.min_scene_length = min_scene_length
+        self.hist_weight = hist_weight
+        self.rgb = rgb
+        self.reset()
+
+    @classmethod
+    def from_config(cls, config, rgb=False):
+        """Создание детектора из секции video_processing конфигурации"""
+        return cls(
+            scan_width=config.get('scene_scan_width', 160),
+            batch_size=config.get('scene_batch_size', 64),
+            min_threshold=config.get('scene_threshold', 0.15),
+            sensitivity=config.get('scene_sensitivity', 3.0),
+            min_scene_length=config.get('scene_min_length', 2.0),
+            rgb=rgb
+        )
+
+    def reset(self):
+        """Сброс состояния перед обработкой нового видео"""
+        self._history = deque(maxlen=self.window)
+        self._prev_hist = None
+        self._prev_gray = None
+        self._last_cut = None
+        self.scanned = 0
+        self.cuts = []
+
+    def iter_scenes(self, frames, fps):
+        """
+        Выбор по одному кадру на сцену из потока кадров
+
+        Представителем сцены считается последний просмотренный кадр перед
+        следующей сменой сцены: у слайдов к этому моменту обычно уже
+        появились все элементы.
+
+        Каждый кадр уменьшается до scan_width сразу после чтения, и решение о
+        смене сцены принимается до чтения следующего кадра. В полном
+        разрешении хранится только текущий представитель сцены, поэтому
+        память не зависит от длины видео и размера пачки. Источнику с
+        кольцом буферов достаточно трех буферов.
+
+        Args:
+            frames (iterable): Пары (индекс кадра, кадр) по возрастанию
+            fps (float): Частота кадров исходного видео
+
+        Yields:
+            tuple: (индекс кадра, кадр) представителя каждой сцены
+        """
+        self.reset()
+        min_gap = max(1, int(round(self.min_scene_length * (fps or 25))))
+        current = None
+
+        for frame_idx, frame in frames:
+            if self.push(frame_idx, frame, min_gap) and current is not None:
+                yield current
+            current = (frame_idx, frame)
+
+        if current is not None:
+            yield current
+
+        logger.info(
+            f"Scene detection: {len(self.cuts) + 1 if self.scanned else 0} scenes "
+            f"from {self.scanned} scanned frames"
+        )
+
+    def push(self, frame_idx, frame, min_gap=1):
+        """
+        Оценка очередного кадра потока
+
+        Args:
+            frame_idx (int): Индекс кадра
+            frame (np.ndarray): Кадр полного или уменьшенного размера
+            min_gap (int): Минимальное расстояние между сменами в кадрах
+
+        Returns:
+            bool: С этого кадра начинается новая сцена
+        """
+        hists, gray = self._features([frame])
+        is_cut = False
+        if self._prev_hist is not None:
+            score = float(self._scores(
+                np.stack([self._prev_hist, hists[0]]),
+                np.stack([self._prev_gray, gray[0]])
+            )[0])
+            self._history.append(score)
+            is_cut = score > self._adaptive_threshold() and self._accept_cut(int(frame_idx), min_gap)
+
+        self._prev_hist = hists[0]
+        self._prev_gray = gray[0]
+        self.scanned += 1
+        return is_cut
+
+    def update(self, indices, frames, min_gap=1):
+        """
+        Расчет оценок смены сцены для пачки кадров
+
+        Args:
+            indices (np.ndarray): Индексы кадров пачки
+            frames (list): Кадры полного или уменьшенного размера
+            min_gap (int): Минимальное расстояние между сменами в кадрах
+
+        Returns:
+            np.ndarray: Булева маска кадров, с которых начинается новая сцена
+        """
+        hists, gray = self._features(frames)
+
+        # Добавляем последний кадр предыдущей пачки для непрерывности
+        if self._prev_hist is not None:
+            hists = np.concatenate([self._prev_hist[None], hists])
+            gray = np.concatenate([self._prev_gray[None], gray])
+
+        cut_mask = np.zeros(len(indices), dtype=bool)
+        if len(hists) > 1:
+            scores = self._scores(hists, gray)
+            self._history.extend(scores.tolist())
+            threshold = self._adaptive_threshold()
+
+            # Оценки относятся к кадрам, с которыми сравнивался предыдущий
+            offset = len(indices) - len(scores)
+            for pos in np.flatnonzero(scores > threshold):
+                frame_pos = pos + offset
+                cut_mask[frame_pos] = self._accept_cut(int(indices[frame_pos]), min_gap)
+
+        self._prev_hist = hists[-1]
+        self._prev_gray = gray[-1]
+        self.scanned += len(indices)
+        return cut_mask
+
+    def _accept_cut(self, frame_idx, min_gap):
+        """Регистрация смены сцены, если она не ближе min_gap к предыдущей"""
+        if self._last_cut is not None and frame_idx - self._last_cut < min_gap:
+            return False
+        self._last_cut = frame_idx
+        self.cuts.append(frame_idx)
+        return True
+
+    def pair_scores(self, frames):
+        """
+        Оценки смены сцены между соседними кадрами без изменения состояния
+
+        Returns:
+            np.ndarray: Массив длины len(frames) - 1
+        """
+        if len(frames) < 2:
+            return np.zeros(0, dtype=np.float32)
+        return self._scores(*self._features(frames))
+
+    def _features(self, frames):
+        """HSV гистограммы и яркость уменьшенных кадров"""
+        small = self._downscale(frames)
+        return self._hsv_histograms(small), small.mean(axis=3, dtype=np.float32)
+
+    def _scores(self, hists, gray):
+        """Взвешенная сумма разницы гистограмм и средней абсолютной разницы"""
+        hist_diff = 0.5 * np.abs(np.diff(hists, axis=0)).sum(axis=1)
+        mad = np.abs(np.diff(gray, axis=0)).mean(axis=(1, 2)) / 255.0
+        return self.hist_weight * hist_diff + (1 - self.hist_weight) * mad
+
+    def _adaptive_threshold(self):
+        """Порог: медиана + sensitivity * MAD по последним оценкам"""
+        history = np.fromiter(self._history, dtype=np.float32, count=len(self._history))
+        median = float(np.median(history))
+        deviation = float(np.median(np.abs(history - median))) * 1.4826
+        return max(self.min_threshold, median + self.sensitivity * deviation)
+
+    def _downscale(self, frames):
+        """Уменьшение кадров до ширины scan_width в одну пачку"""
+        height, width = frames[0].shape[:2]
+        scan_width = min(self.scan_width, width)
+        scan_height = max(1, int(round(height * scan_width / width)))
+
+        small = np.empty((len(frames), scan_height, scan_width, 3), dtype=np.uint8)
+        for i, frame in enumerate(frames):
+            if frame.shape[1] == scan_width and frame.shape[0] == scan_height:
+                small[i] = frame
+            else:
+                small[i] = cv2.resize(frame, (scan_width, scan_height),
+                                      interpolation=cv2.INTER_AREA)
+        return small
+
+    def _hsv_histograms(self, small):
+        """Нормированные HSV гистограммы для всей пачки"""
+        count, height, width, _ = small.shape
+        # Склеиваем пачку в одно высокое изображение для одного вызова cvtColor
+        conversion = cv2.COLOR_RGB2HSV if self.rgb else cv2.COLOR_BGR2HSV
+        hsv = cv2.cvtColor(small.reshape(count * height, width, 3), conversion)
+        hsv = hsv.reshape(count, height * width, 3).astype(np.int32)
+
+        h_bins, s_bins, v_bins = self.hist_bins
+        codes = (
+            (hsv[..., 0] * h_bins // 180) * (s_bins * v_bins)
+            + (hsv[..., 1] * s_bins // 256) * v_bins
+            + hsv[..., 2] * v_bins // 256
+        )
+        n_bins = h_bins * s_bins * v_bins
+        codes += (np.arange(count, dtype=np.int32) * n_bins)[:, None]
+
+        hists = np.bincount(codes.ravel(), minlength=count * n_bins)
+        return hists.reshape(count, n_bins).astype(np.float32) / (height * width)
@@ -12,6 +12,7 @@ from datetime import datetime
 import time
 from threading import Lock
 from celery import Celery
+from celery.signals import worker_init, worker_process_init, task_postrun
 import redis
 import psutil
 import yaml
@@ -30,6 +31,7 @@ import subprocess
 # Импортируем нужные модули
 from .youtube_api import YouTubeAPI
 from .process_video import VideoProcessor
+from .worker_lifecycle import WorkerLifecycle, pool_memory_report
 
 def setup_logging():
     try:
@@ -119,8 +121,12 @@ celery.conf.update({
     'task_serializer': 'json',
     'result_serializer': 'json',
     'accept_content': ['json'],
-    'worker_max_tasks_per_child': 1,
-    'worker_max_memory_per_child': 256*1024,  # 256MB
+    # Процесс переиспользуется между задачами; пересоздание по росту памяти
+    # делает WorkerLifecycle, а этот лимит — аварийный потолок (KB)
+    'worker_max_tasks_per_child': config.get('worker', {}).get('max_tasks_per_child'),
+    'worker_max_memory_per_child': config.get('worker', {}).get('max_memory_mb', 6144) * 1024,
+    # Загрузка моделей в worker_process_init дольше стандартных 4 секунд
+    'worker_proc_alive_timeout': config.get('worker', {}).get('init_timeout', 300),
     'task_time_limit': 1800,  # 30 минут
     'worker_concurrency': 1,
     'broker_connection_retry': True,
@@ -149,8 +155,30 @@ REQUEST_LATENCY = Histogram('request_latency_seconds', 'Request latency in secon
 # Блокировка для синхронизации
 cleanup_lock = Lock()
 
+# Допустимые режимы выбора кадров для задачи
+FRAME_MODES = ('interval', 'scenes', 'keyframes')
+
+# Общий для задач процессор видео с загруженными моделями
+worker_lifecycle = WorkerLifecycle(config, VideoProcessor)
+
+@worker_init.connect
+def init_worker_parent(**kwargs):
+    """Загрузка моделей в главном процессе воркера, общих для дочерних по copy-on-write"""
+    try:
+        worker_lifecycle.preload_in_parent(VideoProcessor.load_models)
+    except Exception as e:
+        logger.error(f"Parent model preload failed, workers will load their own: {e}")
+
+@worker_process_init.connect
+def init_worker_process(**kwargs):
+    """Прогрев моделей в процессе-воркере до первой задачи"""
+    try:
+        worker_lifecycle.preload()
+    except Exception as e:
+        logger.error(f"Worker preload failed: {e}")
+
 @celery.task(bind=True)
-def process_video_task(self, url):
+def process_video_task(self, url, options=None):
     """Задача для обработки видео"""
     try:
         logger.info(f"Starting video processing task for URL: {url}")
@@ -175,11 +203,11 @@ def process_video_task(self, url):
         except (subprocess.SubprocessError, FileNotFoundError):
             logger.error("youtube-dl is not available!")
             
-        # Инициализация VideoProcessor
-        processor = VideoProcessor(config)
+        # VideoProcessor общий для задач процесса
+        processor = worker_lifecycle.get_processor()
         
         # Обработка видео
-        result = processor.process_video(url)
+        result = processor.process_video(url, options)
         logger.info(f"Video processing completed: {result}")
         
         if not result or result.get('status') == 'error':
@@ -198,6 +226,24 @@ def process_video_task(self, url):
             'error': str(e)
         }
 
+@task_postrun.connect(sender=process_video_task)
+def check_worker_memory(**kwargs):
+    """Контроль роста памяти процесса после задачи"""
+    try:
+        worker_lifecycle.after_task()
+    except Exception as e:
+        logger.error(f"Worker memory check failed: {e}")
+
+@celery.task
+def worker_memory_report():
+    """USS/PSS главного процесса воркера и всех дочерних"""
+    report = pool_memory_report()
+    logger.info(
+        f"Worker pool memory: RSS {report['total_rss_mb']:.0f}MB, "
+        f"PSS {report['total_pss_mb']:.0f}MB in {len(report['children']) + 1} processes"
+    )
+    return report
+
 def check_disk_space():
     """Проверка и очистка диска при необходимости"""
     with cleanup_lock:
@@ -262,8 +308,19 @@ def convert_video():
                 'message': 'Invalid URL format'
             }), 400
             
+        # Режим выбора кадров можно задать для отдельной задачи
+        options = {}
+        frame_mode = request.form.get('frame_mode')
+        if frame_mode:
+            if frame_mode not in FRAME_MODES:
+                return jsonify({
+                    'status': 'error',
+                    'message': f"Invalid frame_mode, expected one of: {', '.join(FRAME_MODES)}"
+                }), 400
+            options['frame_mode'] = frame_mode
+            
         # Запускаем задачу в фоне
-        task = process_video_task.delay(url)
+        task = process_video_task.delay(url, options)
         
         return jsonify({
             'status': 'processing',
@@ -0,0 +1,225 @@
+import time
+import logging
+import threading
+import subprocess
+import tempfile
+from contextlib import contextmanager
+
+import numpy as np
+
+from .audio_extractor import PCM_CHUNK_SAMPLES
+
+logger = logging.getLogger(__name__)
+
+# Размер блока чтения растущего файла
+FOLLOW_CHUNK_BYTES = 256 * 1024
+
+class DownloadTracker:
+    def __init__(self):
+        """
+        Состояние загрузки одного файла по progress hooks yt-dlp
+
+        Пока идет загрузка, yt-dlp пишет данные последовательно во временный
+        файл (tmpfilename) и переименовывает его после окончания. Трекер
+        сообщает, когда файл появился и когда в него больше не будут писать.
+        """
+        self.started = threading.Event()
+        self.complete = threading.Event()
+        self.tmp_path = None
+        self.path = None
+        self.error = None
+
+    def hook(self, status):
+        """progress hook для yt-dlp"""
+        if status.get('status') == 'downloading':
+            if not self.started.is_set():
+                self.tmp_path = status.get('tmpfilename')
+                self.path = status.get('filename')
+                self.started.set()
+        elif status.get('status') == 'finished':
+            self.path = status.get('filename') or self.path
+            self.complete.set()
+            self.started.set()
+        elif status.get('status') == 'error':
+            self.fail("download error")
+
+    def fail(self, error):
+        """Загрузка не удалась, читатели файла прекращают ожидание"""
+        self.error = str(error)
+        self.started.set()
+        self.complete.set()
+
+    def on_done(self, future):
+        """Callback future загрузки: ошибка или окончание без hook 'finished'"""
+        error = future.exception()
+        if error is not None:
+            self.fail(error)
+        else:
+            self.complete.set()
+            self.started.set()
+
+def follow_file(tracker, poll_interval=0.2, start_timeout=120):
+    """
+    Чтение файла по мере его загрузки
+
+    Args:
+        tracker (DownloadTracker): Состояние загрузки
+        poll_interval (float): Пауза при отсутствии новых данных
+        start_timeout (float): Ожидание начала загрузки в секундах
+
+    Yields:
+        bytes: Очередные данные файла
+    """
+    if not tracker.started.wait(start_timeout):
+        raise TimeoutError("Download did not start")
+    if tracker.error:
+        raise RuntimeError(f"Download failed: {tracker.error}")
+
+    # Временный файл мог быть уже переименован, открытый дескриптор это переживает
+    source = None
+    for path in (tracker.tmp_path, tracker.path):
+        try:
+            source = open(path, 'rb') if path else None
+        except FileNotFoundError:
+            source = None
+        if source is not None:
+            break
+    if source is None:
+        raise FileNotFoundError(f"Downloaded file not found: {tracker.path}")
+
+    with source:
+        while True:
+            data = source.read(FOLLOW_CHUNK_BYTES)
+            if data:
+                yield data
+                continue
+            if tracker.error:
+                raise RuntimeError(f"Download failed: {tracker.error}")
+            if tracker.complete.is_set():
+                # После окончания загрузки дочитываем то, что успело дописаться
+                data = source.read()
+                if data:
+                    yield data
+                break
+            time.sleep(poll_interval)
+
+def decode_pcm_stream(chunks, command, block_samples=PCM_CHUNK_SAMPLES):
+    """
+    Декодирование байтового потока в PCM через ffmpeg
+
+    Данные подаются в stdin ffmpeg отдельным потоком, моно 16kHz s16le
+    читается из stdout блоками.
+
+    Args:
+        chunks (iterable): Байты исходного файла (например, follow_file)
+        command (list): Команда ffmpeg с входом pipe:0 и выходом s16le в pipe:1
+        block_samples (int): Отсчетов в блоке
+
+    Yields:
+        np.ndarray: Блоки отсчетов float32
+    """
+    logger.info(f"Running command: {' '.join(command)}")
+    with tempfile.TemporaryFile() as stderr:
+        process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=stderr)
+        feed_error = []
+
+        def feed():
+            try:
+                for data in chunks:
+                    process.stdin.write(data)
+            except BrokenPipeError:
+                pass
+            except Exception as e:
+                feed_error.append(e)
+            finally:
+                try:
+                    process.stdin.close()
+                except OSError:
+                    pass
+
+        feeder = threading.Thread(target=feed, name='pcm-stream-feeder', daemon=True)
+        feeder.start()
+
+        buffer = np.empty(block_samples, dtype=np.int16)
+        view = memoryview(buffer).cast('B')
+        try:
+            while True:
+                filled = 0
+                while filled < len(view):
+                    read = process.stdout.readinto(view[filled:])
+                    if not read:
+                        break
+                    filled += read
+                samples = filled // 2
+                if samples:
+                    yield np.multiply(buffer[:samples], 1.0 / 32768.0, dtype=np.float32)
+                if filled < len(view):
+                    break
+        finally:
+            if process.poll() is None and (feed_error or feeder.is_alive()):
+                # Досрочная остановка потребителем или ошибка источника
+                process.kill()
+            process.stdout.close()
+            process.wait()
+            feeder.join(timeout=10)
+
+        if feed_error:
+            raise RuntimeError(f"Audio source failed: {feed_error[0]}")
+        if process.returncode != 0:
+            stderr.seek(0)
+            error = stderr.read().decode(errors='replace').strip()
+            raise RuntimeError(f"FFmpeg stream decoding failed: {error}")
+
+class StageTimer:
+    def __init__(self):
+        """
+        Время этапов обработки одной задачи
+
+        Этапы могут идти параллельно в разных потоках; отчет показывает,
+        насколько они перекрываются и сколько длился самый долгий этап.
+        """
+        self.started = time.perf_counter()
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        """Замер этапа как контекстный менеджер"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            with self._lock:
+                self.stages[name] = (start - self.started, end - self.started)
+
+    def run(self, name, func, *args, **kwargs):
+        """Выполнение функции как этапа (удобно для executor.submit)"""
+        with self.stage(name):
+            return func(*args, **kwargs)
+
+    def report(self):
+        """
+        Returns:
+            dict: Начало, конец и длительность этапов, общее время,
+                сумма этапов и время их перекрытия
+        """
+        with self._lock:
+            stages = dict(self.stages)
+        wall = time.perf_counter() - self.started
+        total = sum(end - start for start, end in stages.values())
+        longest = max(stages.items(), key=lambda item: item[1][1] - item[1][0], default=None)
+        return {
+            'stages': {
+                name: {
+                    'start': round(start, 2),
+                    'end': round(end, 2),
+                    'seconds': round(end - start, 2)
+                }
+                for name, (start, end) in stages.items()
+            },
+            'wall_seconds': round(wall, 2),
+            'stage_seconds': round(total, 2),
+            'overlap_seconds': round(max(total - wall, 0.0), 2),
+            'longest_stage': longest[0] if longest else None
+        }
@@ -0,0 +1,119 @@
+import re
+import html
+import logging
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+from .transcript import TranscriptSegments
+
+logger = logging.getLogger(__name__)
+
+# 00:01:02.345 или 01:02.345 (в SRT разделитель миллисекунд — запятая)
+TIMESTAMP_PATTERN = r'(?:(\d+):)?(\d{1,2}):(\d{2})[.,](\d{3})'
+CUE_PATTERN = re.compile(TIMESTAMP_PATTERN + r'\s*-->\s*' + TIMESTAMP_PATTERN)
+TAG_PATTERN = re.compile(r'<[^>]+>')
+
+def _seconds(hours, minutes, seconds, millis):
+    return int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds) + int(millis) / 1000
+
+def _clean(text):
+    """Текст без тегов разметки, HTML сущностей и лишних пробелов"""
+    return ' '.join(html.unescape(TAG_PATTERN.sub('', text)).split())
+
+def parse_vtt(content):
+    """
+    Разбор WebVTT (и SRT) в сегменты
+
+    Автоматические субтитры YouTube повторяют строку предыдущей реплики в
+    начале следующей («накатывающие» субтитры), такие повторы отбрасываются.
+
+    Args:
+        content (str): Содержимое файла
+
+    Returns:
+        TranscriptSegments: Сегменты с временными метками
+    """
+    starts, ends, texts = [], [], []
+    previous_lines = []
+
+    for block in re.split(r'\n\s*\n', content.replace('\r\n', '\n')):
+        lines = block.strip().split('\n')
+        for i, line in enumerate(lines):
+            match = CUE_PATTERN.search(line)
+            if match:
+                break
+        else:
+            continue
+
+        groups = match.groups()
+        start, end = _seconds(*groups[:4]), _seconds(*groups[4:])
+        cue_lines = [_clean(line) for line in lines[i + 1:]]
+        cue_lines = [line for line in cue_lines if line]
+
+        new_lines = [line for line in cue_lines if line not in previous_lines]
+        if cue_lines:
+            previous_lines = cue_lines
+        if not new_lines or end <= start:
+            continue
+
+        text = ' '.join(new_lines)
+        # Короткие реплики-«перемычки» с тем же текстом склеиваются
+        if texts and texts[-1] == text:
+            ends[-1] = end
+            continue
+        starts.append(start)
+        ends.append(end)
+        texts.append(text)
+
+    return TranscriptSegments(starts, ends, texts)
+
+def parse_srv3(content):
+    """
+    Разбор формата YouTube srv3 (timedtext format="3")
+
+    Args:
+        content (str): XML содержимое
+
+    Returns:
+        TranscriptSegments: Сегменты с временными метками
+    """
+    root = ET.fromstring(content)
+    starts, ends, texts = [], [], []
+
+    for paragraph in root.iter('p'):
+        text = _clean(''.join(paragraph.itertext()))
+        if not text:
+            continue
+        start = int(paragraph.get('t', 0)) / 1000
+        duration = int(paragraph.get('d', 0)) / 1000
+        starts.append(start)
+        ends.append(start + duration)
+        texts.append(text)
+
+    # У автоматических субтитров реплики перекрываются: конец — не позже начала следующей
+    for i in range(len(starts) - 1):
+        if ends[i] > starts[i + 1]:
+            ends[i] = max(starts[i + 1], starts[i])
+
+    return TranscriptSegments(starts, ends, texts)
+
+def parse_subtitles(path):
+    """
+    Разбор файла субтитров по расширению (.vtt, .srt, .srv3, .xml)
+
+    Returns:
+        TranscriptSegments: Сегменты с временными метками
+    """
+    path = Path(path)
+    content = path.read_text(encoding='utf-8', errors='replace')
+    suffix = path.suffix.lower()
+
+    if suffix in ('.srv3', '.xml') or content.lstrip().startswith('<'):
+        segments = parse_srv3(content)
+    elif suffix in ('.vtt', '.srt'):
+        segments = parse_vtt(content)
+    else:
+        raise ValueError(f"Unsupported subtitle format: {path.name}")
+
+    logger.info(f"Parsed {len(segments)} caption segments from {path.name}")
+    return segments
@@ -0,0 +1,120 @@
+import re
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class TranscriptSegments:
+    def __init__(self, starts=(), ends=(), texts=()):
+        """
+        Сегменты транскрипции с временными метками
+
+        Время хранится в массивах NumPy, тексты — в списке. У сегментов без
+        времени (текст без Whisper) вместо меток стоит NaN.
+
+        Args:
+            starts (iterable): Начала сегментов в секундах
+            ends (iterable): Концы сегментов в секундах
+            texts (iterable): Тексты сегментов
+        """
+        self.starts = np.asarray(starts, dtype=np.float64).reshape(-1)
+        self.ends = np.asarray(ends, dtype=np.float64).reshape(-1)
+        self.texts = [str(text).strip() for text in texts]
+        if not (len(self.starts) == len(self.ends) == len(self.texts)):
+            raise ValueError("Segment columns have different lengths")
+
+    @classmethod
+    def from_whisper(cls, result):
+        """Сегменты из результата model.transcribe"""
+        segments = [s for s in result.get('segments', []) if s.get('text', '').strip()]
+        if not segments:
+            return cls.from_text(result.get('text', ''))
+        return cls(
+            [s['start'] for s in segments],
+            [s['end'] for s in segments],
+            [s['text'] for s in segments]
+        )
+
+    @classmethod
+    def from_text(cls, text):
+        """Сегменты-предложения без временных меток"""
+        sentences = [s for s in re.split(r'(?<=[.!?])\s+', (text or '').strip()) if s]
+        nan = np.full(len(sentences), np.nan)
+        return cls(nan, nan, sentences)
+
+    @classmethod
+    def concat(cls, parts):
+        """Объединение нескольких наборов сегментов в один"""
+        parts = list(parts)
+        if not parts:
+            return cls()
+        return cls(
+            np.concatenate([part.starts for part in parts]),
+            np.concatenate([part.ends for part in parts]),
+            [text for part in parts for text in part.texts]
+        )
+
+    def shift(self, offset):
+        """Копия со сдвигом времени на offset секунд"""
+        return TranscriptSegments(self.starts + offset, self.ends + offset, self.texts)
+
+    @property
+    def has_times(self):
+        """У всех сегментов есть временные метки"""
+        return bool(len(self.starts)) and bool(np.isfinite(self.starts).all())
+
+    @property
+    def text(self):
+        """Полный текст транскрипции"""
+        return ' '.join(text for text in self.texts if text)
+
+    def assign(self, times):
+        """
+        Сопоставление сегментов моментам времени слиянием по времени
+
+        Сегмент относится к первому моменту не раньше его середины: кадр-
+        представитель сцены снят в ее конце, поэтому речь перед ним —
+        его контекст. Сегменты после последнего момента относятся к нему.
+
+        Args:
+            times (array-like): Отсортированные времена кадров в секундах
+
+        Returns:
+            np.ndarray: Номер момента для каждого сегмента
+        """
+        times = np.asarray(times, dtype=np.float64)
+        if not len(times):
+            return np.zeros(0, dtype=np.int64)
+        middles = (self.starts + self.ends) / 2
+        positions = np.searchsorted(times, middles, side='left')
+        return np.minimum(positions, len(times) - 1)
+
+    def speech_per_moment(self, times):
+        """Длительность речи (секунды), относящейся к каждому моменту времени"""
+        owners = self.assign(times)
+        durations = np.maximum(self.ends - self.starts, 0)
+        return np.bincount(owners, weights=durations, minlength=len(times))
+
+    def to_dict(self):
+        """Представление для JSON"""
+        return {
+            'starts': [None if np.isnan(t) else round(float(t), 3) for t in self.starts],
+            'ends': [None if np.isnan(t) else round(float(t), 3) for t in self.ends],
+            'texts': list(self.texts)
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Восстановление из to_dict()"""
+        to_float = lambda values: [np.nan if t is None else t for t in values]
+        return cls(to_float(data['starts']), to_float(data['ends']), data['texts'])
+
+    def __len__(self):
+        return len(self.texts)
+
+    def __getitem__(self, index):
+        return {'start': float(self.starts[index]), 'end': float(self.ends[index]), 'text': self.texts[index]}
+
+    def __str__(self):
+        return self.text
@@ -0,0 +1,198 @@
+import os
+import json
+import time
+import zlib
+import hashlib
+import logging
+from pathlib import Path
+
+from .transcript import TranscriptSegments
+
+logger = logging.getLogger(__name__)
+
+class TranscriptCache:
+    def __init__(self, redis_client=None, cache_dir=None, ttl=30 * 24 * 3600,
+                 max_size_mb=200, max_entry_kb=2048, prefix='transcript'):
+        """
+        Кэш транскрипций в Redis с запасным хранилищем на диске
+
+        Значение — сжатый JSON сегментов TranscriptSegments. В Redis записи
+        живут ttl секунд; на диске устаревшие записи удаляются при чтении, а
+        при превышении max_size_mb вытесняются самые старые.
+
+        Args:
+            redis_client: Клиент Redis или None
+            cache_dir (str, optional): Директория для записи на диск
+            ttl (int): Время жизни записи в секундах
+            max_size_mb (int): Лимит размера кэша на диске
+            max_entry_kb (int): Записи больше этого размера не кэшируются
+            prefix (str): Префикс ключей Redis
+        """
+        self.redis = redis_client
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        if self.cache_dir is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.ttl = int(ttl)
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self.max_entry_bytes = int(max_entry_kb * 1024)
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_config(cls, app_config):
+        """Создание кэша по секции transcript_cache конфигурации"""
+        config = app_config.get('transcript_cache', {})
+        storage = app_config.get('storage', {})
+
+        redis_client = None
+        if config.get('redis', True):
+            try:
+                import redis
+                redis_url = os.environ.get('REDIS_URL', 'redis://redis:6379/0')
+                redis_client = redis.from_url(redis_url, socket_timeout=5)
+                redis_client.ping()
+            except Exception as e:
+                logger.warning(f"Redis unavailable for transcript cache, using disk only: {e}")
+                redis_client = None
+
+        cache_dir = Path(storage.get('cache_dir', '/app/cache')) / 'transcripts'
+        return cls(
+            redis_client=redis_client,
+            cache_dir=cache_dir,
+            ttl=config.get('ttl', 30 * 24 * 3600),
+            max_size_mb=config.get('max_size_mb', 200),
+            max_entry_kb=config.get('max_entry_kb', 2048)
+        )
+
+    def key(self, source_id, model, language=None, compute_type='float32'):
+        """
+        Ключ записи
+
+        Args:
+            source_id (str): ID видео YouTube или хэш содержимого файла
+            model (str): Модель Whisper
+            language (str, optional): Язык распознавания (None — автоопределение)
+            compute_type (str): Тип вычислений модели
+        """
+        return f"{self.prefix}:{source_id}:{model}:{language or 'auto'}:{compute_type}"
+
+    def get(self, key):
+        """
+        Транскрипция из кэша
+
+        Returns:
+            TranscriptSegments: Сегменты или None при промахе
+        """
+        payload = self._redis_get(key)
+        if payload is None:
+            payload = self._file_get(key)
+
+        if payload is None:
+            self._count('misses')
+            return None
+
+        try:
+            segments = TranscriptSegments.from_dict(json.loads(zlib.decompress(payload)))
+        except Exception as e:
+            logger.warning(f"Corrupted transcript cache entry {key}: {e}")
+            self._count('misses')
+            return None
+
+        self._count('hits')
+        logger.info(f"Transcript cache hit: {key}")
+        return segments
+
+    def put(self, key, segments):
+        """Сохранение транскрипции в кэш"""
+        payload = zlib.compress(json.dumps(segments.to_dict(), ensure_ascii=False).encode('utf-8'))
+        if len(payload) > self.max_entry_bytes:
+            logger.info(f"Transcript for {key} is too large to cache ({len(payload) / 1024:.0f}KB)")
+            return
+
+        if self._redis_set(key, payload):
+            return
+        self._file_set(key, payload)
+
+    def stats(self):
+        """Счетчики попаданий и промахов (общие для воркеров, если есть Redis)"""
+        stats = {'hits': self.hits, 'misses': self.misses}
+        if self.redis is not None:
+            try:
+                values = self.redis.mget([f"{self.prefix}:stats:hits", f"{self.prefix}:stats:misses"])
+                stats['total_hits'] = int(values[0] or 0)
+                stats['total_misses'] = int(values[1] or 0)
+            except Exception as e:
+                logger.warning(f"Could not read transcript cache counters: {e}")
+        return stats
+
+    def _count(self, name):
+        setattr(self, name, getattr(self, name) + 1)
+        if self.redis is not None:
+            try:
+                self.redis.incr(f"{self.prefix}:stats:{name}")
+            except Exception:
+                pass
+
+    def _redis_get(self, key):
+        if self.redis is None:
+            return None
+        try:
+            return self.redis.get(key)
+        except Exception as e:
+            logger.warning(f"Redis read failed for {key}: {e}")
+            return None
+
+    def _redis_set(self, key, payload):
+        if self.redis is None:
+            return False
+        try:
+            self.redis.set(key, payload, ex=self.ttl)
+            return True
+        except Exception as e:
+            logger.warning(f"Redis write failed for {key}, using disk: {e}")
+            return False
+
+    def _file_path(self, key):
+        return self.cache_dir / f"{hashlib.sha1(key.encode('utf-8')).hexdigest()}.json.z"
+
+    def _file_get(self, key):
+        if self.cache_dir is None:
+            return None
+        path = self._file_path(key)
+        try:
+            if time.time() - path.stat().st_mtime > self.ttl:
+                path.unlink()
+                return None
+            return path.read_bytes()
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Could not read transcript cache file {path}: {e}")
+            return None
+
+    def _file_set(self, key, payload):
+        if self.cache_dir is None:
+            return
+        path = self._file_path(key)
+        try:
+            tmp_path = path.with_suffix('.tmp')
+            tmp_path.write_bytes(payload)
+            os.replace(tmp_path, path)
+            self._evict()
+        except Exception as e:
+            logger.warning(f"Could not write transcript cache file {path}: {e}")
+
+    def _evict(self):
+        """Удаление самых старых файлов сверх лимита размера"""
+        files = []
+        for path in self.cache_dir.glob('*.json.z'):
+            stat = path.stat()
+            files.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_size_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
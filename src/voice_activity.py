@@ -0,0 +1,138 @@
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class VoiceActivityDetector:
+    def __init__(self, sample_rate=16000, frame_ms=30, energy_margin_db=12.0,
+                 min_energy_db=-55.0, max_noise_db=-45.0, zcr_threshold=0.25,
+                 min_speech=0.25, merge_gap=0.8, padding=0.2):
+        """
+        Поиск участков речи по энергии и частоте пересечений нуля
+
+        Порог энергии адаптивный: уровень шума оценивается по тихим кадрам
+        записи. Тихие кадры с высокой частотой пересечений нуля (глухие
+        согласные) тоже считаются речью.
+
+        При вызовах detect() для последовательных окон одной записи детектор
+        помнит самый низкий найденный уровень шума: в окне без пауз 10-й
+        перцентиль энергии — уже речь, и окно иначе целиком отбрасывается.
+        Уровень шума также не выше max_noise_db.
+
+        Args:
+            sample_rate (int): Частота дискретизации аудио
+            frame_ms (int): Длина кадра анализа в миллисекундах
+            energy_margin_db (float): Превышение над уровнем шума для речи
+            min_energy_db (float): Абсолютный нижний порог энергии (dBFS)
+            max_noise_db (float): Верхняя граница оценки уровня шума (dBFS)
+            zcr_threshold (float): Доля пересечений нуля для глухих звуков
+            min_speech (float): Минимальная длина участка речи в секундах
+            merge_gap (float): Паузы короче этой склеиваются (секунды)
+            padding (float): Запас вокруг участка речи в секундах
+        """
+        self.sample_rate = sample_rate
+        self.frame_length = max(1, int(sample_rate * frame_ms / 1000))
+        self.energy_margin_db = energy_margin_db
+        self.min_energy_db = min_energy_db
+        self.max_noise_db = max_noise_db
+        self.zcr_threshold = zcr_threshold
+        self.min_speech = min_speech
+        self.merge_gap = merge_gap
+        self.padding = padding
+        self.noise_floor_db = None
+        self.stats = {}
+
+    @classmethod
+    def from_config(cls, config):
+        """Создание детектора из секции transcription конфигурации"""
+        return cls(
+            energy_margin_db=config.get('vad_margin_db', 12.0),
+            max_noise_db=config.get('vad_max_noise_db', -45.0),
+            min_speech=config.get('vad_min_speech', 0.25),
+            merge_gap=config.get('vad_merge_gap', 0.8),
+            padding=config.get('vad_padding', 0.2)
+        )
+
+    def detect(self, samples):
+        """
+        Участки речи в записи
+
+        Args:
+            samples (np.ndarray): Моно отсчеты float32 в диапазоне [-1, 1]
+
+        Returns:
+            list: Пары (начало, конец) в отсчетах, по возрастанию
+        """
+        total = len(samples)
+        speech = self.speech_frames(samples)
+        regions = self._regions(speech, total)
+
+        speech_samples = sum(end - start for start, end in regions)
+        self.stats = {
+            'duration': round(total / self.sample_rate, 2),
+            'speech_duration': round(speech_samples / self.sample_rate, 2),
+            'regions': len(regions),
+            'skipped_fraction': round(1 - speech_samples / total, 4) if total else 0.0
+        }
+        logger.info(
+            f"VAD: {len(regions)} speech regions, "
+            f"{self.stats['skipped_fraction']:.1%} of {self.stats['duration']}s skipped"
+        )
+        return regions
+
+    def speech_frames(self, samples):
+        """Булева маска кадров по frame_length отсчетов, содержащих речь"""
+        count = len(samples) // self.frame_length
+        if count == 0:
+            return np.zeros(0, dtype=bool)
+
+        frames = samples[:count * self.frame_length].reshape(count, self.frame_length)
+        energy = np.einsum('ij,ij->i', frames, frames, dtype=np.float64) / self.frame_length
+        energy_db = 10 * np.log10(energy + 1e-10)
+
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (self.frame_length - 1)
+
+        # Уровень шума по самым тихим кадрам этого и предыдущих окон записи
+        noise_db = float(np.percentile(energy_db, 10))
+        if self.noise_floor_db is not None:
+            noise_db = min(noise_db, self.noise_floor_db)
+        noise_db = min(noise_db, self.max_noise_db)
+        self.noise_floor_db = noise_db
+        threshold = max(self.min_energy_db, noise_db + self.energy_margin_db)
+
+        voiced = energy_db > threshold
+        unvoiced = (energy_db > threshold - self.energy_margin_db / 2) & (zcr > self.zcr_threshold)
+        return voiced | unvoiced
+
+    def _regions(self, speech, total):
+        """Участки из маски кадров: склейка пауз, отсев коротких, запас"""
+        if not speech.any():
+            return []
+
+        # Границы серий речевых кадров
+        edges = np.diff(np.concatenate([[0], speech.view(np.int8), [0]]))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+
+        merge_frames = self.merge_gap * self.sample_rate / self.frame_length
+        keep = np.concatenate([[True], starts[1:] - ends[:-1] > merge_frames])
+        starts = starts[keep]
+        ends = ends[np.concatenate([keep[1:], [True]])]
+
+        min_frames = self.min_speech * self.sample_rate / self.frame_length
+        long_enough = ends - starts >= min_frames
+        starts, ends = starts[long_enough], ends[long_enough]
+
+        pad = int(self.padding * self.sample_rate)
+        regions = []
+        for start, end in zip(starts * self.frame_length, ends * self.frame_length):
+            start = max(0, int(start) - pad)
+            end = min(total, int(end) + pad)
+            # Запас мог сомкнуть соседние участки
+            if regions and start <= regions[-1][1]:
+                regions[-1] = (regions[-1][0], end)
+            else:
+                regions.append((start, end))
+        return regions
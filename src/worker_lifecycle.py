@@ -0,0 +1,211 @@
+import gc
+import os
+import ctypes
+import logging
+import threading
+
+from .model_registry import ModelRegistry, _process_rss
+
+logger = logging.getLogger(__name__)
+
+class WorkerLifecycle:
+    def __init__(self, config, processor_factory):
+        """
+        Жизненный цикл процесса-воркера Celery
+
+        Процессор видео создается один раз на процесс и переиспользуется
+        между задачами вместе с загруженными моделями. После каждой задачи
+        измеряется прирост RSS относительно состояния после прогрева; если он
+        превышает worker.max_rss_growth_mb, процессор и модели пересоздаются
+        внутри того же процесса.
+
+        Args:
+            config (dict): Полная конфигурация приложения
+            processor_factory (callable): Создание процессора по конфигурации
+        """
+        self.config = config
+        self.worker_config = config.get('worker', {})
+        self.processor_factory = processor_factory
+        self.processor = None
+        self.baseline_rss = None
+        self.tasks = 0
+        self.recycles = 0
+        self._lock = threading.Lock()
+
+    def preload(self):
+        """Создание процессора и загрузка моделей до первой задачи"""
+        with self._lock:
+            if gc.get_freeze_count():
+                logger.info(f"Using {len(ModelRegistry.memory_report())} models preloaded in parent process")
+            self._create_processor()
+
+    def preload_in_parent(self, load_models):
+        """
+        Загрузка моделей в главном процессе воркера до создания дочерних
+
+        Дочерние процессы prefork наследуют ModelRegistry и делят страницы
+        весов с родителем по copy-on-write. gc.freeze() переносит все
+        объекты в постоянное поколение, чтобы сборщик мусора в дочерних
+        процессах не трогал их заголовки и не копировал страницы.
+
+        CUDA нельзя инициализировать до fork, поэтому при работе на GPU
+        модели по-прежнему загружаются в каждом дочернем процессе.
+
+        Args:
+            load_models (callable): Загрузка моделей по конфигурации
+        """
+        if not self.worker_config.get('preload_in_parent', True):
+            return
+        import torch
+        if torch.cuda.is_available():
+            logger.info("CUDA available, models will be loaded in each worker process")
+            return
+
+        report = load_models(self.config)
+        gc.collect()
+        gc.freeze()
+        logger.info(
+            f"Preloaded models in parent process {os.getpid()}: {report}, "
+            f"{gc.get_freeze_count()} objects frozen"
+        )
+
+    def get_processor(self):
+        """Общий для задач процессор (создается при первом обращении)"""
+        with self._lock:
+            if self.processor is None:
+                self._create_processor()
+            return self.processor
+
+    def after_task(self):
+        """
+        Проверка роста памяти после задачи
+
+        Returns:
+            dict: Отчет о памяти процесса
+        """
+        with self._lock:
+            self.tasks += 1
+            gc.collect()
+            _trim_heap()
+
+            report = self.report()
+            limit_mb = self.worker_config.get('max_rss_growth_mb', 1024)
+            if limit_mb and report['growth_mb'] > limit_mb:
+                logger.warning(
+                    f"Worker RSS grew by {report['growth_mb']:.0f}MB "
+                    f"(limit {limit_mb}MB) after {self.tasks} tasks, recycling processor"
+                )
+                self._recycle()
+                report = self.report()
+            else:
+                logger.info(
+                    f"Worker memory after task {self.tasks}: RSS {report['rss_mb']:.0f}MB, "
+                    f"growth {report['growth_mb']:.0f}MB"
+                )
+            return report
+
+    def report(self):
+        """Текущий RSS, прирост, разделяемая память и загруженные модели"""
+        rss = _process_rss()
+        baseline = self.baseline_rss or rss
+        report = {
+            'rss_mb': round(rss / 1024 / 1024, 1),
+            'baseline_mb': round(baseline / 1024 / 1024, 1),
+            'growth_mb': round((rss - baseline) / 1024 / 1024, 1),
+            'tasks': self.tasks,
+            'recycles': self.recycles,
+            'models_mb': ModelRegistry.memory_report()
+        }
+        report.update(memory_breakdown())
+        return report
+
+    def _create_processor(self):
+        self.processor = self.processor_factory(self.config)
+        if self.worker_config.get('preload_models', True):
+            self.processor.preload_models()
+        gc.collect()
+        # Базовый уровень — процесс с уже загруженными моделями
+        self.baseline_rss = _process_rss()
+        logger.info(f"Worker processor ready, RSS {self.baseline_rss / 1024 / 1024:.0f}MB")
+
+    def _recycle(self):
+        """
+        Пересоздание процессора и моделей без перезапуска процесса
+
+        Модели, унаследованные от родителя, после этого загружаются заново
+        и перестают быть общими.
+        """
+        self.processor = None
+        ModelRegistry.clear()
+        gc.collect()
+        _trim_heap()
+        self.recycles += 1
+        self._create_processor()
+
+def memory_breakdown(pid=None):
+    """
+    Уникальная и разделяемая память процесса
+
+    USS — страницы, принадлежащие только процессу; PSS — доля с учетом
+    разделения с другими процессами; shared — RSS за вычетом USS.
+
+    Returns:
+        dict: pid, rss_mb, uss_mb, pss_mb, shared_mb
+    """
+    pid = pid or os.getpid()
+    try:
+        import psutil
+        info = psutil.Process(pid).memory_full_info()
+        rss, uss, pss = info.rss, info.uss, getattr(info, 'pss', 0)
+    except Exception:
+        rss, uss, pss = _smaps_rollup(pid)
+
+    return {
+        'pid': pid,
+        'rss_mb': round(rss / 1024 / 1024, 1),
+        'uss_mb': round(uss / 1024 / 1024, 1),
+        'pss_mb': round(pss / 1024 / 1024, 1),
+        'shared_mb': round(max(rss - uss, 0) / 1024 / 1024, 1)
+    }
+
+def pool_memory_report(parent_pid=None):
+    """
+    Память главного процесса воркера и всех его дочерних процессов
+
+    Сумма PSS — реальный объем памяти пула с учетом общих страниц.
+
+    Args:
+        parent_pid (int, optional): PID главного процесса; по умолчанию
+            родитель текущего процесса (вызов из дочернего процесса prefork)
+    """
+    import psutil
+    parent = psutil.Process(parent_pid or os.getppid())
+    processes = [memory_breakdown(parent.pid)]
+    processes += [memory_breakdown(child.pid) for child in parent.children()]
+    return {
+        'parent': processes[0],
+        'children': processes[1:],
+        'total_rss_mb': round(sum(p['rss_mb'] for p in processes), 1),
+        'total_pss_mb': round(sum(p['pss_mb'] for p in processes), 1)
+    }
+
+def _smaps_rollup(pid):
+    """RSS, USS и PSS из /proc/<pid>/smaps_rollup (в байтах)"""
+    values = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].endswith(':') and parts[1].isdigit():
+                    values[parts[0][:-1]] = int(parts[1]) * 1024
+    except OSError:
+        return 0, 0, 0
+    uss = values.get('Private_Clean', 0) + values.get('Private_Dirty', 0)
+    return values.get('Rss', 0), uss, values.get('Pss', 0)
+
+def _trim_heap():
+    """Возврат свободной памяти кучи glibc операционной системе"""
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except Exception:
+        pass
@@ -1,8 +1,11 @@
 import os
+import copy
+import time
 import logging
 import requests
 import json
 import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from googleapiclient.discovery import build
 import redis
@@ -11,6 +14,174 @@ from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 import subprocess
 
+# Максимум ID в одном запросе videos.list
+VIDEOS_BATCH_LIMIT = 50
+DEFAULT_API_BASE_URL = 'https://www.googleapis.com/youtube/v3'
+
+ISO_DURATION_PATTERN = re.compile(
+    r'^P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+(?:\.\d+)?)S)?)?$'
+)
+CHAPTER_LINE_PATTERN = re.compile(r'^\s*[\[(]?((?:\d+:)?\d{1,2}:\d{2})[\])]?\s*[-–—:|]?\s*(.+?)\s*$')
+
+def parse_iso_duration(value):
+    """Длительность ISO 8601 (PT1H2M3S) в секундах; 0, если формат неизвестен"""
+    match = ISO_DURATION_PATTERN.match(value or '')
+    if not match:
+        return 0
+    days, hours, minutes, seconds = match.groups()
+    return (int(days or 0) * 86400 + int(hours or 0) * 3600
+            + int(minutes or 0) * 60 + int(float(seconds or 0)))
+
+def parse_chapters(description, duration=0):
+    """
+    Главы из описания видео (строки «00:00 Введение»)
+
+    YouTube показывает главы, если список начинается с 0:00 и в нем не
+    меньше трех отметок; так же они разбираются здесь.
+
+    Returns:
+        list: Главы {'start_time', 'end_time', 'title'} в формате yt-dlp
+    """
+    chapters = []
+    for line in (description or '').splitlines():
+        match = CHAPTER_LINE_PATTERN.match(line)
+        if not match:
+            continue
+        parts = [int(part) for part in match.group(1).split(':')]
+        start = sum(part * 60 ** i for i, part in enumerate(reversed(parts)))
+        if chapters and start <= chapters[-1]['start_time']:
+            continue
+        chapters.append({'start_time': float(start), 'title': match.group(2)})
+
+    if len(chapters) < 3 or chapters[0]['start_time'] != 0:
+        return []
+    for chapter, following in zip(chapters, chapters[1:] + [None]):
+        chapter['end_time'] = following['start_time'] if following else float(duration or chapter['start_time'])
+    return chapters
+
+def normalize_video_item(item):
+    """
+    Ресурс videos.list в плоский словарь метаданных
+
+    Returns:
+        dict: id, title, channel, published_at, duration (секунды),
+            chapters, has_captions, thumbnail
+    """
+    snippet = item.get('snippet', {})
+    details = item.get('contentDetails', {})
+    duration = parse_iso_duration(details.get('duration'))
+    thumbnails = snippet.get('thumbnails', {})
+    thumbnail = (thumbnails.get('high') or thumbnails.get('medium') or thumbnails.get('default') or {}).get('url')
+    return {
+        'id': item.get('id'),
+        'title': snippet.get('title'),
+        'channel': snippet.get('channelTitle'),
+        'published_at': snippet.get('publishedAt'),
+        'duration': duration,
+        'chapters': parse_chapters(snippet.get('description'), duration),
+        'has_captions': str(details.get('caption', '')).lower() == 'true',
+        'thumbnail': thumbnail
+    }
+
+def _format_size(fmt, duration=None):
+    """Размер формата в байтах по filesize, filesize_approx или битрейту"""
+    size = fmt.get('filesize') or fmt.get('filesize_approx')
+    if not size and fmt.get('tbr') and duration:
+        size = fmt['tbr'] * 1000 / 8 * duration
+    return int(size or 0)
+
+def select_split_formats(formats, max_height=480, min_audio_bitrate=48):
+    """
+    Выбор отдельных потоков аудио и видео для загрузки без склейки
+    
+    Аудио — самый легкий поток не ниже min_audio_bitrate (этого достаточно
+    для распознавания речи). Видео — поток без звука наибольшей высоты не
+    выше max_height; при равной высоте предпочитаются частота до 30 fps,
+    кодек не AV1 (дешевле декодировать на CPU) и меньший битрейт.
+    
+    Args:
+        formats (list): info['formats'] из yt-dlp
+        max_height (int): Максимальная высота кадра
+        min_audio_bitrate (float): Минимальный битрейт аудио, kbps
+        
+    Returns:
+        tuple: (формат аудио, формат видео) или None, если раздельных потоков нет
+    """
+    audio_formats = [
+        f for f in formats
+        if f.get('vcodec') == 'none' and f.get('acodec') not in (None, 'none')
+        and 'drc' not in str(f.get('format_id', ''))
+    ]
+    video_formats = [
+        f for f in formats
+        if f.get('acodec') == 'none' and f.get('vcodec') not in (None, 'none') and f.get('height')
+    ]
+    if not audio_formats or not video_formats:
+        return None
+        
+    bitrate = lambda f: f.get('abr') or f.get('tbr') or 0
+    sufficient = [f for f in audio_formats if bitrate(f) >= min_audio_bitrate]
+    if sufficient:
+        audio = min(sufficient, key=bitrate)
+    else:
+        audio = max(audio_formats, key=bitrate)
+        
+    capped = [f for f in video_formats if f['height'] <= max_height]
+    if capped:
+        video = max(capped, key=lambda f: (
+            f['height'],
+            (f.get('fps') or 30) <= 30,
+            not str(f.get('vcodec', '')).startswith('av01'),
+            -(f.get('tbr') or 0)
+        ))
+    else:
+        video = min(video_formats, key=lambda f: (f['height'], f.get('tbr') or 0))
+    return audio, video
+
+def plan_video_ranges(info, count=30, window=8.0, max_fraction=0.5):
+    """
+    Отрезки видео, которых достаточно для выбора кадров
+    
+    Если у видео есть главы, берется начало каждой главы (не больше count),
+    иначе — грубая равномерная сетка из count отрезков. Длина отрезка —
+    window секунд. Пересекающиеся отрезки объединяются.
+    
+    Args:
+        info (dict): Метаданные yt-dlp (duration, chapters)
+        count (int): Максимальное количество отрезков
+        window (float): Длина отрезка в секундах
+        max_fraction (float): Если отрезки покрывают большую долю видео,
+            выгоднее загрузить поток целиком
+            
+    Returns:
+        list: Отрезки [(начало, конец)] в секундах или None
+    """
+    duration = float(info.get('duration') or 0)
+    if duration <= 0 or count <= 0:
+        return None
+        
+    chapters = [c for c in info.get('chapters') or [] if c.get('start_time') is not None]
+    if len(chapters) >= 2:
+        starts = [float(c['start_time']) for c in chapters]
+        if len(starts) > count:
+            # Равномерная выборка глав
+            starts = [starts[int(i * len(starts) / count)] for i in range(count)]
+    else:
+        starts = [(i + 0.5) * duration / count - window / 2 for i in range(count)]
+        
+    ranges = []
+    for start in sorted(starts):
+        start = min(max(start, 0.0), max(duration - window, 0.0))
+        end = min(start + window, duration)
+        if ranges and start <= ranges[-1][1]:
+            ranges[-1] = (ranges[-1][0], max(ranges[-1][1], end))
+        else:
+            ranges.append((start, end))
+            
+    if sum(end - start for start, end in ranges) > duration * max_fraction:
+        return None
+    return ranges
+
 class YouTubeAPI:
     def __init__(self):
         """Инициализация YouTube API"""
@@ -71,31 +242,384 @@ class YouTubeAPI:
             raise
 
     def get_video_info(self, video_id, timeout=(5, 30)):
-        """Получение информации о видео с таймаутом"""
+        """
+        Метаданные видео (из кэша Redis или videos.list)
+        
+        Returns:
+            dict: Результат normalize_video_item()
+        """
         try:
+            info = self.get_videos_info([video_id], timeout=timeout).get(video_id)
+            if info is None:
+                raise ValueError("Video not found")
+            return info
+            
+        except requests.Timeout:
+            self.logger.error(f"Timeout getting video info for {video_id}")
+            raise
+        except Exception as e:
+            self.logger.error(f"Error getting video info: {e}")
+            raise
+            
+    def get_videos_info(self, video_ids, timeout=(5, 30)):
+        """
+        Метаданные нескольких видео с кэшем в Redis
+        
+        Найденные в кэше видео не запрашиваются; остальные запрашиваются
+        пачками до 50 ID на запрос videos.list (ограничение API) и
+        кэшируются на youtube_api.metadata_ttl секунд.
+        
+        Args:
+            video_ids (list): ID видео
+            
+        Returns:
+            dict: ID видео -> метаданные; ненайденных видео в ответе нет
+        """
+        video_ids = list(dict.fromkeys(video_id for video_id in video_ids if video_id))
+        result = self._cached_videos(video_ids)
+        missing = [video_id for video_id in video_ids if video_id not in result]
+        
+        base_url = self.config.get('base_url') or DEFAULT_API_BASE_URL
+        batch_size = min(int(self.config.get('batch_size', VIDEOS_BATCH_LIMIT)), VIDEOS_BATCH_LIMIT)
+        for i in range(0, len(missing), batch_size):
+            batch = missing[i:i + batch_size]
             response = self.session.get(
-                f"https://www.googleapis.com/youtube/v3/videos",
+                f"{base_url.rstrip('/')}/videos",
                 params={
-                    'id': video_id,
+                    'id': ','.join(batch),
                     'part': 'snippet,contentDetails',
+                    'maxResults': len(batch),
                     'key': self.api_key
                 },
                 timeout=timeout
             )
             response.raise_for_status()
             
-            data = response.json()
-            if not data.get('items'):
-                raise ValueError("Video not found")
-                
-            return data['items'][0]
+            fetched = {}
+            for item in response.json().get('items', []):
+                info = normalize_video_item(item)
+                fetched[info['id']] = info
+            self._cache_videos(fetched)
+            result.update(fetched)
             
-        except requests.Timeout:
-            self.logger.error(f"Timeout getting video info for {video_id}")
-            raise
+        if missing:
+            self.logger.info(
+                f"Video metadata: {len(video_ids) - len(missing)} cached, "
+                f"{len(missing)} requested in {(len(missing) + batch_size - 1) // batch_size} API calls"
+            )
+        return result
+        
+    def _metadata_key(self, video_id):
+        return f"youtube:video:{video_id}"
+        
+    def _cached_videos(self, video_ids):
+        """Метаданные из Redis (пустой словарь, если Redis недоступен)"""
+        if self.redis_client is None or not video_ids:
+            return {}
+        try:
+            values = self.redis_client.mget([self._metadata_key(video_id) for video_id in video_ids])
         except Exception as e:
-            self.logger.error(f"Error getting video info: {e}")
-            raise
+            self.logger.warning(f"Could not read video metadata cache: {e}")
+            return {}
+        return {
+            video_id: json.loads(value)
+            for video_id, value in zip(video_ids, values)
+            if value
+        }
+        
+    def _cache_videos(self, videos):
+        """Запись метаданных в Redis с TTL"""
+        if self.redis_client is None or not videos:
+            return
+        ttl = int(self.config.get('metadata_ttl', 24 * 3600))
+        try:
+            pipeline = self.redis_client.pipeline()
+            for video_id, info in videos.items():
+                pipeline.set(self._metadata_key(video_id), json.dumps(info, ensure_ascii=False), ex=ttl)
+            pipeline.execute()
+        except Exception as e:
+            self.logger.warning(f"Could not write video metadata cache: {e}")
+
+    def subtitle_options(self, languages, automatic=True):
+        """
+        Параметры yt-dlp для загрузки дорожки субтитров
+        
+        Args:
+            languages (list): Коды языков по убыванию приоритета
+            automatic (bool): Разрешить автоматические субтитры YouTube
+        """
+        return {
+            'writesubtitles': True,
+            'writeautomaticsub': automatic,
+            'subtitleslangs': list(languages),
+            # srv3 содержит точные метки реплик без «накатывающих» повторов
+            'subtitlesformat': 'srv3/vtt/best'
+        }
+        
+    def captions_from_info(self, info, languages):
+        """
+        Загруженная дорожка субтитров из результата yt-dlp
+        
+        Returns:
+            dict: {'path', 'language', 'automatic'} или None, если дорожки
+                на нужном языке нет
+        """
+        requested = (info or {}).get('requested_subtitles') or {}
+        manual = (info or {}).get('subtitles') or {}
+        for language in languages:
+            track = requested.get(language)
+            path = track.get('filepath') if track else None
+            if path and os.path.exists(path):
+                return {
+                    'path': path,
+                    'language': language,
+                    'automatic': language not in manual
+                }
+        return None
+        
+    def has_captions(self, info, languages, automatic=True):
+        """Есть ли у видео дорожка субтитров на одном из языков (по метаданным)"""
+        tracks = dict((info or {}).get('subtitles') or {})
+        if automatic:
+            tracks.update((info or {}).get('automatic_captions') or {})
+        return any(language in tracks for language in languages)
+        
+    def plan_split_download(self, url, max_height=480, min_audio_bitrate=48,
+                            range_count=0, range_window=8.0, range_min_duration=600):
+        """
+        Метаданные видео и план раздельной загрузки аудио и видео
+        
+        Args:
+            url (str): URL видео
+            max_height (int): Максимальная высота видео
+            min_audio_bitrate (float): Минимальный битрейт аудио, kbps
+            range_count (int): Если больше 0, видео загружается только
+                отрезками (plan_video_ranges), аудио — целиком
+            range_window (float): Длина отрезка видео в секундах
+            range_min_duration (float): Видео короче загружается целиком
+            
+        Returns:
+            dict: 'info', 'audio_format', 'video_format', 'ranges' или None,
+                если у видео нет раздельных потоков
+        """
+        base_opts = {
+            'noplaylist': True,
+            'quiet': True,
+            'no_warnings': True
+        }
+        with yt_dlp.YoutubeDL(base_opts) as ydl:
+            info = ydl.extract_info(url, download=False)
+        if not info:
+            return None
+            
+        selected = select_split_formats(info.get('formats') or [], max_height, min_audio_bitrate)
+        if selected is None:
+            self.logger.info(f"No separate audio/video streams for {url}")
+            return None
+        audio_format, video_format = selected
+        
+        duration = info.get('duration') or 0
+        ranges = None
+        if range_count and duration >= range_min_duration:
+            ranges = plan_video_ranges(info, range_count, range_window)
+            
+        self.logger.info(
+            f"Split download plan for {url}: audio {audio_format['format_id']} "
+            f"({audio_format.get('abr') or '?'}kbps), video {video_format['format_id']} "
+            f"({video_format.get('height')}p {video_format.get('vcodec')})"
+            + (f", {len(ranges)} video ranges" if ranges else "")
+        )
+        return {
+            'info': info,
+            'audio_format': audio_format,
+            'video_format': video_format,
+            'ranges': ranges
+        }
+        
+    def download_stream(self, plan, stream, output_dir, concurrent_fragments=4,
+                        caption_languages=None, automatic_captions=True, progress_hook=None):
+        """
+        Загрузка одного потока из plan_split_download()
+        
+        Args:
+            plan (dict): План загрузки
+            stream (str): 'audio' или 'video'
+            output_dir (str): Директория для файлов
+            concurrent_fragments (int): Одновременно загружаемых фрагментов
+            caption_languages (list, optional): Языки субтитров (только для аудио)
+            automatic_captions (bool): Разрешить автоматические субтитры
+            progress_hook (callable, optional): Дополнительный progress hook yt-dlp
+            
+        Returns:
+            dict: 'path', 'sections', 'bytes', 'info'
+        """
+        fmt = plan[f"{stream}_format"]
+        template = os.path.join(output_dir, f"%(id)s.{stream}.%(ext)s")
+        extra_opts = {}
+        if stream == 'audio' and caption_languages:
+            extra_opts.update(self.subtitle_options(caption_languages, automatic_captions))
+        if stream == 'video' and plan.get('ranges'):
+            # ffmpeg читает только нужные байты потока по HTTP range
+            template = os.path.join(output_dir, '%(id)s.video.%(section_start)s.%(ext)s')
+            extra_opts.update({
+                'download_ranges': yt_dlp.utils.download_range_func(None, plan['ranges']),
+                'force_keyframes_at_cuts': False
+            })
+        return self._download_format(
+            plan['info'], fmt['format_id'], template, concurrent_fragments,
+            extra_opts, progress_hooks=[progress_hook] if progress_hook else None
+        )
+        
+    def download_stats(self, plan, audio, video, seconds):
+        """Статистика раздельной загрузки: форматы, байты по потокам и время"""
+        ranges = plan.get('ranges')
+        duration = plan['info'].get('duration') or 0
+        video_seconds = sum(end - start for start, end in ranges) if ranges else duration
+        return {
+            'audio_format': plan['audio_format']['format_id'],
+            'video_format': plan['video_format']['format_id'],
+            'video_height': plan['video_format'].get('height'),
+            'video_ranges': len(ranges) if ranges else 0,
+            'audio_bytes': audio['bytes'],
+            'video_bytes': video['bytes'],
+            'total_bytes': audio['bytes'] + video['bytes'],
+            'planned_bytes': _format_size(plan['audio_format'], duration) + (
+                int(_format_size(plan['video_format'], duration) * video_seconds / duration) if duration else 0
+            ),
+            'seconds': round(seconds, 2)
+        }
+        
+    def download_split(self, url, output_dir, max_height=480, min_audio_bitrate=48,
+                       concurrent_fragments=4, caption_languages=None, automatic_captions=True,
+                       range_count=0, range_window=8.0, range_min_duration=600,
+                       plan=None, audio_tracker=None, while_downloading=None, stages=None):
+        """
+        Раздельная загрузка потока аудио и видео без звука
+        
+        Метаданные запрашиваются один раз, затем оба потока загружаются
+        параллельно, каждый с concurrent_fragments одновременными фрагментами.
+        Потоки не склеиваются: аудио нужно только для распознавания речи, видео
+        — только для кадров, и его высота ограничена max_height.
+        
+        Пока потоки загружаются, в текущем потоке можно выполнить
+        while_downloading — например, распознавать аудио по мере загрузки,
+        следя за файлом через audio_tracker.
+        
+        Args:
+            url (str): URL видео
+            output_dir (str): Директория для файлов
+            max_height (int): Максимальная высота видео
+            min_audio_bitrate (float): Минимальный битрейт аудио, kbps
+            concurrent_fragments (int): Одновременно загружаемых фрагментов
+            caption_languages (list, optional): Языки субтитров (загружаются вместе с аудио)
+            automatic_captions (bool): Разрешить автоматические субтитры
+            range_count (int): Если больше 0, видео загружается только
+                отрезками (plan_video_ranges), аудио — целиком
+            range_window (float): Длина отрезка видео в секундах
+            range_min_duration (float): Видео короче загружается целиком
+            plan (dict, optional): Готовый результат plan_split_download()
+            audio_tracker (DownloadTracker, optional): Получает progress hook
+                и окончание загрузки аудио
+            while_downloading (callable, optional): Вызывается без аргументов
+                после запуска загрузок, результат возвращается в 'result'
+            stages (StageTimer, optional): Замер этапов download_audio и
+                download_video
+            
+        Returns:
+            dict: 'audio', 'video' (пути), 'video_sections' (отрезки
+                {'path', 'start', 'end'} или None), 'info', 'captions',
+                'stats' и 'result' или None, если у видео нет раздельных потоков
+        """
+        if plan is None:
+            plan = self.plan_split_download(
+                url, max_height, min_audio_bitrate, range_count, range_window, range_min_duration
+            )
+        if plan is None:
+            return None
+            
+        def run(stage, *args):
+            if stages is None:
+                return self.download_stream(*args)
+            return stages.run(stage, self.download_stream, *args)
+            
+        started = time.perf_counter()
+        result = None
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            audio_future = executor.submit(
+                run, 'download_audio', plan, 'audio', output_dir, concurrent_fragments,
+                caption_languages, automatic_captions,
+                audio_tracker.hook if audio_tracker is not None else None
+            )
+            video_future = executor.submit(
+                run, 'download_video', plan, 'video', output_dir, concurrent_fragments
+            )
+            if audio_tracker is not None:
+                audio_future.add_done_callback(audio_tracker.on_done)
+            if while_downloading is not None:
+                result = while_downloading()
+            audio, video = audio_future.result(), video_future.result()
+            
+        stats = self.download_stats(plan, audio, video, time.perf_counter() - started)
+        self.logger.info(
+            f"Downloaded {stats['total_bytes'] / 1024 / 1024:.1f}MB "
+            f"(audio {stats['audio_bytes'] / 1024 / 1024:.1f}MB, "
+            f"video {stats['video_bytes'] / 1024 / 1024:.1f}MB) in {stats['seconds']}s"
+        )
+        
+        captions = None
+        if caption_languages:
+            captions = self.captions_from_info(audio['info'], caption_languages)
+        return {
+            'audio': audio['path'],
+            'video': video['path'],
+            'video_sections': video['sections'] if plan['ranges'] else None,
+            'info': plan['info'],
+            'captions': captions,
+            'stats': stats,
+            'result': result
+        }
+        
+    def _download_format(self, info, format_id, output_template, concurrent_fragments,
+                         extra_opts=None, progress_hooks=None):
+        """Загрузка одного формата по уже полученным метаданным"""
+        downloaded = {'bytes': 0, 'path': None}
+        
+        def progress_hook(status):
+            if status.get('status') == 'finished':
+                downloaded['bytes'] += status.get('total_bytes') or status.get('downloaded_bytes') or 0
+                downloaded['path'] = status.get('filename')
+                
+        ydl_opts = {
+            'format': format_id,
+            'outtmpl': output_template,
+            'noplaylist': True,
+            'quiet': True,
+            'no_warnings': True,
+            'concurrent_fragment_downloads': concurrent_fragments,
+            'progress_hooks': [progress_hook] + list(progress_hooks or []),
+            **(extra_opts or {})
+        }
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            result = ydl.process_ie_result(copy.deepcopy(info), download=True)
+            
+        requested = (result or {}).get('requested_downloads') or [{}]
+        path = requested[0].get('filepath') or downloaded['path']
+        if not path or not os.path.exists(path) or os.path.getsize(path) == 0:
+            raise RuntimeError(f"Format {format_id} was not downloaded")
+            
+        # При download_ranges каждый отрезок — отдельный файл
+        sections = [
+            {
+                'path': item['filepath'],
+                'start': float(item.get('section_start') or 0),
+                'end': item.get('section_end')
+            }
+            for item in requested
+            if item.get('filepath') and os.path.exists(item['filepath'])
+        ]
+        if not downloaded['bytes']:
+            downloaded['bytes'] = sum(os.path.getsize(section['path']) for section in sections)
+        return {'path': path, 'sections': sections, 'bytes': downloaded['bytes'], 'info': result}
 
     def set_session_cookies(self, cookies):
         """Установка куков сессии"""
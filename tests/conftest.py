@@ -0,0 +1,13 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+@pytest.fixture
+def fixtures_dir():
+    """Директория с локальными файлами для тестов"""
+    return Path(__file__).parent / 'fixtures'
@@ -0,0 +1,72 @@
+import logging
+
+import numpy as np
+import pytest
+
+from src.subtitles import parse_vtt, parse_srv3, parse_subtitles
+
+def test_parse_vtt_drops_rolling_repeats(fixtures_dir):
+    content = (fixtures_dir / 'captions.vtt').read_text(encoding='utf-8')
+    segments = parse_vtt(content)
+
+    assert segments.texts == [
+        'Привет всем',
+        'сегодня & завтра',
+        'мы изучаем интегралы',
+        'Конец лекции'
+    ]
+    np.testing.assert_allclose(segments.starts, [0.0, 2.51, 5.0, 67.25])
+    np.testing.assert_allclose(segments.ends, [2.5, 5.0, 7.0, 69.0])
+    assert segments.has_times
+
+def test_parse_vtt_accepts_srt_timestamps():
+    content = "1\n00:00:01,000 --> 00:00:02,500\n<i>Строка</i>\n"
+    segments = parse_vtt(content)
+
+    assert segments.texts == ['Строка']
+    np.testing.assert_allclose(segments.starts, [1.0])
+    np.testing.assert_allclose(segments.ends, [2.5])
+
+def test_parse_srv3_clips_overlapping_cues(fixtures_dir):
+    content = (fixtures_dir / 'captions.srv3').read_text(encoding='utf-8')
+    segments = parse_srv3(content)
+
+    assert segments.texts == ['Первая реплика', 'Вторая & реплика', 'Третья']
+    np.testing.assert_allclose(segments.starts, [0.0, 2.0, 6.0])
+    np.testing.assert_allclose(segments.ends, [2.0, 4.5, 7.5])
+
+def test_parse_subtitles_by_extension(fixtures_dir, tmp_path):
+    assert len(parse_subtitles(fixtures_dir / 'captions.vtt')) == 4
+    assert len(parse_subtitles(fixtures_dir / 'captions.srv3')) == 3
+
+    unknown = tmp_path / 'captions.txt'
+    unknown.write_text('просто текст', encoding='utf-8')
+    with pytest.raises(ValueError):
+        parse_subtitles(unknown)
+
+@pytest.fixture
+def processor():
+    """VideoProcessor без загрузки моделей и проверки окружения"""
+    for module in ('torch', 'cv2', 'whisper', 'yt_dlp', 'redis', 'requests', 'googleapiclient'):
+        pytest.importorskip(module)
+    from src.process_video import VideoProcessor
+
+    processor = VideoProcessor.__new__(VideoProcessor)
+    processor.logger = logging.getLogger(__name__)
+    processor.audio_stats = {}
+    return processor
+
+def test_captions_file_option_replaces_whisper(processor, fixtures_dir):
+    path = str(fixtures_dir / 'captions.srv3')
+    captions = processor._captions_file({'captions_file': path}, ['ru', 'en'])
+    assert captions == {'path': path, 'language': 'ru', 'automatic': False}
+
+    # Субтитры разбираются до поиска в кэше и извлечения аудио
+    segments = processor._get_transcription('missing.mp4', captions=captions)
+    assert segments.texts == ['Первая реплика', 'Вторая & реплика', 'Третья']
+    assert processor.audio_stats['captions'] == {'language': 'ru', 'automatic': False, 'segments': 3}
+
+def test_captions_file_option_missing(processor, tmp_path):
+    assert processor._captions_file({}, ['ru']) is None
+    with pytest.raises(FileNotFoundError):
+        processor._captions_file({'captions_file': str(tmp_path / 'missing.vtt')}, ['ru'])
@@ -0,0 +1,156 @@
+import json
+import logging
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+for module in ('requests', 'redis', 'yt_dlp', 'googleapiclient'):
+    pytest.importorskip(module)
+
+from src.youtube_api import YouTubeAPI, parse_iso_duration, parse_chapters
+
+DESCRIPTION = "Лекция\n0:00 Введение\n1:30 - Пределы\n[05:00] Интегралы\n"
+
+class StubVideosHandler(BaseHTTPRequestHandler):
+    """videos.list: ID, оканчивающиеся на 'x', не существуют"""
+    requests = []
+
+    def do_GET(self):
+        url = urllib.parse.urlparse(self.path)
+        params = urllib.parse.parse_qs(url.query)
+        ids = params['id'][0].split(',')
+        self.requests.append({'path': url.path, 'ids': ids, 'key': params['key'][0]})
+
+        items = [
+            {
+                'id': video_id,
+                'snippet': {
+                    'title': f"Title {video_id}",
+                    'channelTitle': 'Channel',
+                    'description': DESCRIPTION
+                },
+                'contentDetails': {'duration': 'PT10M', 'caption': 'true'}
+            }
+            for video_id in ids if not video_id.endswith('x')
+        ]
+        body = json.dumps({'items': items}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class FakeRedis:
+    """Словарь вместо Redis (decode_responses=True)"""
+    def __init__(self):
+        self.data = {}
+        self.ttl = {}
+        self.mget_calls = 0
+
+    def mget(self, keys):
+        self.mget_calls += 1
+        return [self.data.get(key) for key in keys]
+
+    def pipeline(self):
+        return self
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+        self.ttl[key] = ex
+
+    def execute(self):
+        return []
+
+class BrokenRedis:
+    def mget(self, keys):
+        raise ConnectionError("redis is down")
+
+    def pipeline(self):
+        raise ConnectionError("redis is down")
+
+@pytest.fixture
+def stub_server():
+    StubVideosHandler.requests = []
+    server = HTTPServer(('127.0.0.1', 0), StubVideosHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def api(stub_server):
+    """YouTubeAPI с локальным base_url, без ключей и cookies"""
+    api = YouTubeAPI.__new__(YouTubeAPI)
+    api.logger = logging.getLogger(__name__)
+    api.config = {
+        'base_url': f"http://127.0.0.1:{stub_server.server_port}/youtube/v3/",
+        'metadata_ttl': 60
+    }
+    api._setup_session()
+    api.api_key = 'test-key'
+    api.redis_client = FakeRedis()
+    return api
+
+def test_batches_and_cache(api):
+    ids = [f"video{i}" for i in range(120)]
+    result = api.get_videos_info(ids + ids[:5])
+
+    assert sorted(result) == sorted(ids)
+    assert [len(request['ids']) for request in StubVideosHandler.requests] == [50, 50, 20]
+    assert all(request['path'] == '/youtube/v3/videos' for request in StubVideosHandler.requests)
+    assert all(request['key'] == 'test-key' for request in StubVideosHandler.requests)
+    assert len(api.redis_client.data) == 120
+    assert set(api.redis_client.ttl.values()) == {60}
+
+    # Повторный запрос целиком из кэша, новые ID — одним запросом
+    StubVideosHandler.requests.clear()
+    result = api.get_videos_info(ids[:10] + ['fresh1', 'fresh2'])
+    assert len(result) == 12
+    assert [request['ids'] for request in StubVideosHandler.requests] == [['fresh1', 'fresh2']]
+
+    StubVideosHandler.requests.clear()
+    assert api.get_video_info('video7')['title'] == 'Title video7'
+    assert StubVideosHandler.requests == []
+
+def test_normalized_metadata(api):
+    info = api.get_video_info('lecture')
+
+    assert info['title'] == 'Title lecture'
+    assert info['channel'] == 'Channel'
+    assert info['duration'] == 600
+    assert info['has_captions'] is True
+    assert [chapter['title'] for chapter in info['chapters']] == ['Введение', 'Пределы', 'Интегралы']
+    assert info['chapters'][-1]['end_time'] == 600
+    assert json.loads(api.redis_client.data['youtube:video:lecture']) == info
+
+def test_missing_video(api):
+    with pytest.raises(ValueError):
+        api.get_video_info('deletedx')
+    assert api.redis_client.data == {}
+
+def test_redis_errors_fall_back_to_api(api):
+    api.redis_client = BrokenRedis()
+    result = api.get_videos_info(['video1', 'video2'])
+
+    assert sorted(result) == ['video1', 'video2']
+    assert len(StubVideosHandler.requests) == 1
+
+def test_batch_size_is_capped(api):
+    api.config['batch_size'] = 200
+    api.get_videos_info([f"video{i}" for i in range(60)])
+
+    assert [len(request['ids']) for request in StubVideosHandler.requests] == [50, 10]
+
+def test_parse_helpers():
+    assert parse_iso_duration('PT1H2M3S') == 3723
+    assert parse_iso_duration('P1DT1S') == 86401
+    assert parse_iso_duration('garbage') == 0
+    # Меньше трех глав или первая не с 0:00 — глав нет
+    assert parse_chapters("0:00 Начало\n2:00 Конец", 300) == []
+    assert parse_chapters("0:10 A\n1:00 B\n2:00 C", 300) == []